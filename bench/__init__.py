@@ -0,0 +1,6 @@
+"""
+Benchmarks for cinter.
+
+Run each one as a module from the project root, e.g. `python -m bench.lexer_engines`.
+"""
+__author__ = 'YieldNull'
@@ -0,0 +1,107 @@
+"""
+Generated CMM sources for benchmarks.
+
+A source is a stream of lexemes drawn from four kinds with tunable weights:
+    identifier - names of 1 to 24 chars, reserved words among them
+    number     - int and real literals
+    operator   - operators and delimiters
+    comment    - `//` line comments and `/* */` block comments
+
+The lexemes are valid CMM tokens, but the source is not a valid program,
+so it is only meant for the lexer.
+"""
+import random
+from io import StringIO
+
+__author__ = 'YieldNull'
+
+KINDS = ('identifier', 'number', 'operator', 'comment')
+
+MIXES = {
+    'balanced': {'identifier': 4, 'number': 2, 'operator': 5, 'comment': 1},
+    'identifiers': {'identifier': 10, 'number': 1, 'operator': 2, 'comment': 0},
+    'numbers': {'identifier': 1, 'number': 10, 'operator': 2, 'comment': 0},
+    'operators': {'identifier': 1, 'number': 1, 'operator': 10, 'comment': 0},
+    'comments': {'identifier': 2, 'number': 1, 'operator': 2, 'comment': 6},
+}
+
+_UNIT = 1 << 16  # chars generated before repeating
+_RESERVED = ['if', 'else', 'while', 'int', 'real', 'return', 'void', 'read', 'write']
+_OPERATORS = ['+', '-', '*', '/', '=', '==', '<', '<>', '>', '(', ')', '[', ']', '{', '}', ',', ';']
+_LETTERS = 'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ'
+_TAIL = _LETTERS + '0123456789_'
+
+
+def _identifier(rnd):
+    if rnd.random() < 0.2:
+        return rnd.choice(_RESERVED)
+    name = rnd.choice(_LETTERS) + ''.join(rnd.choice(_TAIL) for _ in range(rnd.randint(0, 22)))
+    return name if len(name) == 1 else name + rnd.choice(_LETTERS)  # can not end with '_'
+
+
+def _number(rnd):
+    value = str(rnd.randint(0, 10 ** rnd.randint(1, 9)))
+    if rnd.random() < 0.4:
+        value += '.' + str(rnd.randint(0, 99999))
+    return value
+
+
+def _operator(rnd):
+    return rnd.choice(_OPERATORS)
+
+
+def _comment(rnd):
+    words = ' '.join(_identifier(rnd) for _ in range(rnd.randint(1, 12)))
+    if rnd.random() < 0.5:
+        return '// %s\n' % words
+    return '/* %s\n * %s */' % (words, words[::-1])
+
+
+_MAKERS = {'identifier': _identifier, 'number': _number, 'operator': _operator, 'comment': _comment}
+
+
+def gen_source(size, mix='balanced', seed=0):
+    """
+    Generate a source of exactly `size` chars.
+
+    A unit of at most 64 KB is generated and repeated, so that huge sources are cheap to build.
+    :param mix: a name in MIXES, or a dict of weight of each kind
+    :param seed: seed of the random generator, the same seed gives the same source
+    """
+    weights = MIXES[mix] if isinstance(mix, str) else mix
+    kinds = [kind for kind in KINDS if weights.get(kind)]
+    rnd = random.Random(seed)
+
+    unit = StringIO()
+    length = 0
+    column = 0
+    while length < min(size, _UNIT):
+        lexeme = _MAKERS[rnd.choices(kinds, [weights[kind] for kind in kinds])[0]](rnd)
+        if lexeme.endswith('\n'):
+            sep = ''
+            column = 0
+        elif column > 72:
+            sep = '\n'
+            column = 0
+        else:
+            sep = ' '
+            column += len(lexeme) + 1
+        unit.write(lexeme + sep)
+        length += len(lexeme) + len(sep)
+
+    unit = unit.getvalue()
+    if '\n' not in unit[-1:]:
+        unit += '\n'  # each repetition starts a new line
+    source = unit * (size // len(unit) + 1)
+    return _cut(source, size)
+
+
+def _cut(source, size):
+    """
+    Cut `source` to `size` chars at a line end, padding the rest with blanks,
+    so that no token or comment is cut in half.
+    """
+    end = source.rfind('\n', 0, size)
+    while source[end + 1:end + 2] == ' ':  # inside a block comment, lexemes never start with ' '
+        end = source.rfind('\n', 0, end)
+    return source[:end + 1] + ' ' * (size - end - 1)
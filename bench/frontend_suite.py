@@ -0,0 +1,151 @@
+"""
+Throughput and memory of each phase of the front end on generated programs.
+
+For each program, the phases are timed one by one, each on the result of the one before:
+    parse    - lex and parse the source into a syntax tree
+    semantic - check the syntax tree, building the symbol tables
+    compile  - generate the IR of the checked syntax tree
+Each row gives:
+    nodes/s  - syntax tree nodes over the best time of a few runs
+    peak(KB) - the peak memory allocated in the phase, what the phases before it allocated excluded
+
+The programs are those of `bench.programs` in each size and shape,
+and the sample programs in test/6_program as small-program baselines.
+A generated program is named by its shape and the size it comes out at,
+which is above the size asked for when a unit of the shape is larger.
+Results can be saved as JSON and compared with a saved run:
+
+    python -m bench.frontend_suite [--sizes KB,...] [--shapes name,...] [--no-samples] [--json FILE] [--compare FILE]
+
+The default sizes go from 1 KB to 1 MB.
+"""
+import argparse
+import sys
+from io import StringIO
+
+from bench.programs import SHAPES, gen_program
+from bench.suite import read_samples, measure, add_arguments, finish
+from cinter.inter import Code
+from cinter.lexer import Lexer
+from cinter.parser import Parser
+
+__author__ = 'YieldNull'
+
+PHASES = ('parse', 'semantic', 'compile')
+
+SIZES = [1, 16, 256, 1024]  # KB
+
+
+class FrontEndError(Exception):
+    pass
+
+
+def count_nodes(root):
+    """
+    :return: the number of nodes in the syntax tree
+    """
+    count = 0
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        count += 1
+        stack += node.childItems
+    return count
+
+
+def _parse(source):
+    parser = Parser(StringIO(source), stdout=StringIO(), stderr=StringIO())
+    if not parser.parse():
+        raise FrontEndError(parser.stderr.getvalue())
+    return parser
+
+
+def _semantic(parser):
+    parser._declare_builtins()
+    error = parser._check(parser.rootNode) or parser.stable.check_main()
+    if error:
+        raise FrontEndError(error)
+    return parser
+
+
+def _compile(parser):
+    Code.line = -1
+    return parser.rootNode.gen_code()
+
+
+_RUNS = {'parse': _parse, 'semantic': _semantic, 'compile': _compile}
+
+
+def _setup(phase, source):
+    """
+    Run the phases before `phase`
+    :return: the argument of `phase`
+    """
+    arg = source
+    for before in PHASES[:PHASES.index(phase)]:
+        arg = _RUNS[before](arg)
+    return arg
+
+
+def programs(sizes, shapes, samples=True):
+    """
+    :return: list of (name, source) to measure. Sizes which come out at the same program give it once
+    """
+    result = read_samples() if samples else []
+    names = set()
+    for size in sizes:
+        for shape in shapes:
+            source = gen_program(size * 1024, shape)
+            name = '%s-%dK' % (shape, max(1, int(round(len(source) / 1024.0))))
+            if name not in names:
+                names.add(name)
+                result.append((name, source))
+    return result
+
+
+def run(cases, out=sys.stdout):
+    """
+    Measure every phase on every program and print a row for each.
+    :param cases: list of (name, source)
+    :return: the results, as saved in JSON
+    """
+    results = []
+    out.write('%18s %10s %9s %8s %10s %14s %12s\n' % (
+        'program', 'size(KB)', 'phase', 'nodes', 'seconds', 'nodes/s', 'peak(KB)'))
+    for name, source in cases:
+        nodes = count_nodes(_parse(source).rootNode)
+        for phase in PHASES:
+            # what the phases before allocated is not counted
+            seconds, peak = measure(_RUNS[phase], lambda: _setup(phase, source))[1:]
+            result = {'program': name, 'size_kb': len(source) / 1024.0, 'phase': phase, 'nodes': nodes,
+                      'seconds': seconds, 'nodes_per_second': nodes / seconds if seconds else 0.0, 'peak_kb': peak}
+            results.append(result)
+            out.write('%18s %10.1f %9s %8d %10.4f %14.0f %12.1f\n' % (
+                name, result['size_kb'], phase, nodes, seconds, result['nodes_per_second'], peak))
+            out.flush()
+    return results
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description='Front end throughput on generated programs.')
+    parser.add_argument('--sizes', default=','.join(str(size) for size in SIZES),
+                        help='comma separated sizes in KB, default %(default)s')
+    parser.add_argument('--shapes', default=','.join(sorted(SHAPES)),
+                        help='comma separated shapes of bench.programs, default %(default)s')
+    parser.add_argument('--no-samples', action='store_true', help='leave out the programs in test/6_program')
+    add_arguments(parser)
+    args = parser.parse_args(argv)
+
+    sizes = [int(size) for size in args.sizes.split(',')] if args.sizes else []
+    shapes = args.shapes.split(',') if args.shapes else []
+    for shape in shapes:
+        if shape not in SHAPES:
+            parser.error('unknown shape %s' % shape)
+
+    results = run(programs(sizes, shapes, samples=not args.no_samples))
+    finish(args, results, ['program', 'phase'], ['nodes_per_second', 'peak_kb'],
+           lexer_version=Lexer.version, parser_version=Parser.version)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,75 @@
+"""
+Compare the speed of the lexer engines on large inputs.
+
+Two inputs are built for each size:
+    samples   - the sample programs in test/6_program repeated, dense short tokens
+    commented - declarations with long identifiers under block comments
+
+    python -m bench.lexer_engines [size_in_kb ...]
+"""
+import sys
+import time
+from io import StringIO
+
+from bench.suite import ENGINE_NAMES, read_samples
+from cinter.lexer import ENGINES
+
+__author__ = 'YieldNull'
+
+
+def gen_samples(size):
+    """
+    Repeat the sample programs until the source is at least `size` chars long.
+    """
+    unit = ''.join(source + '\n' for name, source in read_samples())
+    return unit * (size // len(unit) + 1)
+
+
+def gen_commented(size):
+    """
+    Generate commented declarations until the source is at least `size` chars long.
+    """
+    source = StringIO()
+    i = 0
+    while source.tell() < size:
+        source.write('/* generated declaration %d\n'
+                     ' * keeps the value of another generated declaration\n'
+                     ' */\n'
+                     'int generated_value_%d = generated_value_%d * 12345;\n' % (i, i + 1, i))
+        i += 1
+    return source.getvalue()
+
+
+_CORPORA = [('samples', gen_samples), ('commented', gen_commented)]
+
+
+def run(engine, source, repeat=3):
+    """
+    Lex `source` with `engine` and return (token count, best seconds of `repeat` runs).
+    """
+    best = None
+    count = 0
+    for _ in range(repeat):
+        lexer = ENGINES[engine](StringIO(source))
+        count = 0
+        start = time.perf_counter()
+        while lexer.next_token():
+            count += 1
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return count, best
+
+
+def main(sizes):
+    print('%10s %10s %8s %10s %10s %14s' % ('size(KB)', 'corpus', 'engine', 'tokens', 'seconds', 'tokens/s'))
+    for size in sizes:
+        for corpus, gen in _CORPORA:
+            source = gen(size * 1024)
+            for engine in sorted(ENGINE_NAMES):
+                count, seconds = run(engine, source)
+                print('%10d %10s %8s %10d %10.3f %14.0f' % (
+                    size, corpus, ENGINE_NAMES[engine], count, seconds, count / seconds))
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or [64, 1024, 4096])
@@ -0,0 +1,86 @@
+"""
+Throughput and memory of each lexer engine on generated corpora.
+
+For each size, mix of `bench.corpus` and engine, the source is lexed to the end:
+    tokens/s - tokens over the best time of a few runs
+    peak(KB) - the peak memory allocated while lexing, the source read from the stream included.
+               It is measured by tracemalloc in one more run, so that tracing does not slow down the timed runs
+
+Results can be saved as JSON and compared with a saved run:
+
+    python -m bench.lexer_suite [--sizes KB,...] [--mixes name,...] [--json FILE] [--compare FILE]
+
+The default sizes go from 1 KB to 50 MB.
+"""
+import argparse
+import sys
+from io import StringIO
+
+from bench.corpus import MIXES, gen_source
+from bench.suite import ENGINE_NAMES, measure, add_arguments, finish
+from cinter.lexer import Lexer, ENGINES
+
+__author__ = 'YieldNull'
+
+SIZES = [1, 16, 256, 4096, 51200]  # KB
+
+
+def lex(engine, stdin):
+    """
+    Lex the source in `stdin` to the end.
+    :return: token count
+    """
+    lexer = ENGINES[engine](stdin)
+    next_token = lexer.next_token
+    count = 0
+    while next_token():
+        count += 1
+    return count
+
+
+def run(sizes, mixes, out=sys.stdout):
+    """
+    Measure every engine on every corpus and print a row for each.
+    :return: the results, as saved in JSON
+    """
+    results = []
+    out.write('%10s %12s %8s %10s %10s %14s %12s\n' % (
+        'size(KB)', 'mix', 'engine', 'tokens', 'seconds', 'tokens/s', 'peak(KB)'))
+    for size in sizes:
+        for mix in mixes:
+            source = gen_source(size * 1024, mix)
+            for engine in sorted(ENGINE_NAMES):
+                # the stream itself is not counted
+                count, seconds, peak = measure(lambda stdin: lex(engine, stdin), lambda: StringIO(source))
+                result = {'size_kb': size, 'mix': mix, 'engine': ENGINE_NAMES[engine], 'tokens': count,
+                          'seconds': seconds, 'tokens_per_second': count / seconds if seconds else 0.0,
+                          'peak_kb': peak}
+                results.append(result)
+                out.write('%10d %12s %8s %10d %10.3f %14.0f %12.1f\n' % (
+                    size, mix, ENGINE_NAMES[engine], count, seconds, result['tokens_per_second'], peak))
+                out.flush()
+    return results
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description='Lexer throughput on generated corpora.')
+    parser.add_argument('--sizes', default=','.join(str(size) for size in SIZES),
+                        help='comma separated sizes in KB, default %(default)s')
+    parser.add_argument('--mixes', default=','.join(sorted(MIXES)),
+                        help='comma separated mixes of bench.corpus, default %(default)s')
+    add_arguments(parser)
+    args = parser.parse_args(argv)
+
+    sizes = [int(size) for size in args.sizes.split(',')]
+    mixes = args.mixes.split(',')
+    for mix in mixes:
+        if mix not in MIXES:
+            parser.error('unknown mix %s' % mix)
+
+    results = run(sizes, mixes)
+    finish(args, results, ['size_kb', 'mix', 'engine'], ['tokens_per_second', 'peak_kb'],
+           lexer_version=Lexer.version)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,77 @@
+"""
+Micro-benchmark of `Parser._match`.
+
+Token matching is timed on the tokens of the sample programs, with a single kind and with a set
+of kinds, against the way it was done before token kinds: the expected tokens were given as
+Token objects, and a list of their types was built on every call.
+
+    python -m bench.parser_match [rounds]
+"""
+import sys
+import timeit
+from io import StringIO
+
+from bench.lexer_engines import gen_samples
+from cinter.parser import Parser, KINDS_COMP_OP
+from cinter.tokens import Token, Token_SEMICOLON, Token_LT, Token_GT, Token_EQUAL, Token_NEQUAL, Kind
+
+__author__ = 'YieldNull'
+
+
+def match_tokens(parser, t):
+    """
+    `Parser._match` as it was before token kinds
+    """
+    if isinstance(t, Token):
+        t = (t,)
+    _type = parser._advance()
+    if _type is not None and _type in [tp.type for tp in t]:
+        return True
+    else:
+        return False
+
+
+def prepare(size=1 << 16):
+    """
+    :return: a parser whose buffer holds the tokens of the samples
+    """
+    parser = Parser(StringIO(gen_samples(size)), stdout=StringIO())
+    while parser._advance() is not None:
+        pass
+    return parser
+
+
+def run(parser, rounds):
+    """
+    :param rounds: times to match every token in the buffer
+    :return: list of (case, seconds per call before, seconds per call now)
+    """
+    count = len(parser.buffer)
+    cases = [
+        ('single', (match_tokens, parser, Token_SEMICOLON), (Parser._match, parser, Kind.SEMICOLON)),
+        ('set', (match_tokens, parser, (Token_LT, Token_GT, Token_EQUAL, Token_NEQUAL)),
+         (Parser._match_any, parser, KINDS_COMP_OP)),
+    ]
+    results = []
+    for name, before, now in cases:
+        timings = []
+        for match, self, expected in (before, now):
+            def walk():
+                self.index = 0
+                for _ in range(count):
+                    match(self, expected)
+
+            timings.append(min(timeit.repeat(walk, number=rounds, repeat=3)) / (rounds * count))
+        results.append((name, timings[0], timings[1]))
+    return results
+
+
+def main(argv):
+    rounds = int(argv[0]) if argv else 10
+    print('%8s %14s %14s %8s' % ('case', 'before(ns)', 'now(ns)', 'speedup'))
+    for name, before, now in run(prepare(), rounds):
+        print('%8s %14.1f %14.1f %7.2fx' % (name, before * 1e9, now * 1e9, before / now))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,133 @@
+"""
+Generated CMM programs for benchmarks of the parser and the rest of the front end.
+
+Unlike `bench.corpus`, a program is valid all the way to IR. It is made of units,
+each a function or a declaration of one shape, followed by `main`:
+    functions   - many small functions, each calls the one before
+    expressions - functions returning long expressions of arithmetic and calls
+    nesting     - functions of if and while blocks nested deep
+    arrays      - global arrays with large initializers, and functions walking them
+"""
+import random
+from io import StringIO
+
+__author__ = 'YieldNull'
+
+NESTING_DEPTH = 64  # blocks nested in a unit of `nesting`, kept well below the recursion limit of gen_code
+EXPRESSION_TERMS = 256  # operands in an expression of `expressions`
+ARRAY_SIZE = 512  # items in an initializer of `arrays`
+
+_MAIN = '''void main(){
+    int i=read();
+    write(i);
+    return;
+}
+'''
+
+
+def _functions(rnd, i):
+    call = 'f%d(c,a)' % (i - 1) if i > 0 else 'a-b'
+    return '''int f%d(int a,int b){
+    int c=a*%d+b;
+    if(c>%d){
+        c=%s;
+    }else{
+        c=c-1;
+    }
+    return c;
+}
+''' % (i, rnd.randint(1, 9), rnd.randint(10, 999), call)
+
+
+def _expressions(rnd, i):
+    out = StringIO()
+    out.write('int e%d(int x,int y){\n    int r=' % i)
+    depth = 0  # open parentheses
+    for term in range(EXPRESSION_TERMS):
+        if term > 0:
+            out.write(rnd.choice('+-*/'))
+        if depth < 8 and rnd.random() < 0.1:
+            out.write('(')
+            depth += 1
+        choice = rnd.random()
+        if choice < 0.4:
+            out.write(rnd.choice('xy'))
+        elif choice < 0.9 or i == 0:
+            out.write(str(rnd.randint(1, 999)))
+        else:
+            out.write('e%d(x,%d)' % (i - 1, rnd.randint(1, 99)))
+        if depth > 0 and rnd.random() < 0.1:
+            out.write(')')
+            depth -= 1
+        if term % 16 == 15:
+            out.write('\n        ')
+    out.write(')' * depth)
+    out.write(';\n    return r;\n}\n')
+    return out.getvalue()
+
+
+def _nesting(rnd, i):
+    out = StringIO()
+    out.write('int n%d(int a){\n' % i)
+    blocks = [rnd.random() < 0.5 for _ in range(NESTING_DEPTH)]  # True for if, False for while
+    for depth, is_if in enumerate(blocks):
+        indent = '\t' * (depth + 1)
+        out.write('%s%s(a%s%d){\n' % (indent, 'if' if is_if else 'while', '<' if is_if else '>',
+                                        rnd.randint(1, 999)))
+        out.write('%s    a=a-%d;\n' % (indent, rnd.randint(1, 9)))
+    for depth in range(NESTING_DEPTH - 1, -1, -1):
+        indent = '\t' * (depth + 1)
+        if blocks[depth] and depth % 2 == 0:
+            out.write('%s}else{\n%s    a=a+1;\n' % (indent, indent))
+        out.write('%s}\n' % indent)
+    out.write('    return a;\n}\n')
+    return out.getvalue()
+
+
+def _arrays(rnd, i):
+    if rnd.random() < 0.5:
+        items = [str(rnd.randint(0, 99999)) for _ in range(ARRAY_SIZE)]
+        _type, one = 'int', '1'
+    else:
+        items = ['%d.%d' % (rnd.randint(0, 999), rnd.randint(0, 99)) for _ in range(ARRAY_SIZE)]
+        _type, one = 'real', '1.0'
+    lines = [','.join(items[j:j + 16]) for j in range(0, ARRAY_SIZE, 16)]
+    return '''%s[%d] a%d={
+    %s
+};
+int s%d(int n){
+    int i=0;
+    while(i<n){
+        a%d[i]=a%d[i]+%s;
+        i=i+1;
+    }
+    return i;
+}
+''' % (_type, ARRAY_SIZE, i, ',\n    '.join(lines), i, i, i, one)
+
+
+SHAPES = {
+    'functions': _functions,
+    'expressions': _expressions,
+    'nesting': _nesting,
+    'arrays': _arrays,
+}
+
+
+def gen_program(size, shape='functions', seed=0):
+    """
+    Generate a program of units of `shape` until it is at least `size` chars long
+    :param shape: a name in SHAPES
+    :param seed: seed of the random generator, the same seed gives the same program
+    """
+    rnd = random.Random(seed)
+    out = StringIO()
+    length = 0
+    i = 0
+    while length < size:
+        unit = SHAPES[shape](rnd, i)
+        out.write(unit)
+        length += len(unit)
+        i += 1
+    out.write(_MAIN)
+    return out.getvalue()
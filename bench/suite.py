@@ -0,0 +1,106 @@
+"""
+Parts shared by the benchmark suites: timing and peak memory of a run,
+the sample programs, and results saved as JSON and compared with a saved run.
+"""
+import glob
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+from cinter.lexer import Lexer
+
+__author__ = 'YieldNull'
+
+SAMPLES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'test', '6_program', '*.t')
+
+ENGINE_NAMES = {
+    Lexer.engine_dfa: 'dfa',
+    Lexer.engine_regex: 'regex',
+    Lexer.engine_bytes: 'bytes',
+}
+
+
+def read_samples():
+    """
+    :return: list of (file name, source) of the sample programs in test/6_program
+    """
+    samples = []
+    for path in sorted(glob.glob(SAMPLES)):
+        with open(path) as f:
+            samples.append((os.path.basename(path), f.read()))
+    return samples
+
+
+def measure(run, setup, budget=1.0):
+    """
+    Time `run(setup())`, repeating it for `budget` seconds and at least once.
+    The peak memory is measured by tracemalloc in one more run, so that tracing does not slow down the timed runs.
+    :param run: function(arg) to measure
+    :param setup: function() giving the argument of `run`, neither timed nor traced
+    :return: (what `run` returns, seconds of the best run, peak KB allocated by `run`)
+    """
+    best = None
+    spent = 0.0
+    value = None
+    while best is None or spent + best < budget:
+        arg = setup()
+        start = time.perf_counter()
+        value = run(arg)
+        elapsed = time.perf_counter() - start
+        spent += elapsed
+        best = elapsed if best is None else min(best, elapsed)
+
+    arg = setup()
+    tracemalloc.start()
+    try:
+        run(arg)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return value, best, peak / 1024.0
+
+
+def add_arguments(parser):
+    """
+    Add the options to save and compare results to an argparse parser
+    """
+    parser.add_argument('--json', help='save the results to this file')
+    parser.add_argument('--compare', help='compare with the results saved in this file')
+
+
+def finish(args, results, keys, metrics, out=sys.stdout, **versions):
+    """
+    Compare the results with a saved run and save them, as the options of `add_arguments` ask.
+    :param keys: names of the fields which identify a case
+    :param metrics: names of the fields to compare
+    :param versions: versions of the code measured, saved along with the results
+    """
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f), keys, metrics, out)
+    if args.json:
+        info = {'python': platform.python_version(), 'time': time.strftime('%Y-%m-%d %H:%M:%S'), 'results': results}
+        info.update(versions)
+        with open(args.json, 'w') as f:
+            json.dump(info, f, indent=2)
+
+
+def compare(results, baseline, keys, metrics, out=sys.stdout):
+    """
+    Print the change of each metric from a saved run, for each case in both runs.
+    """
+    old = dict((tuple(r[key] for key in keys), r) for r in baseline['results'])
+    out.write('\n%s\n' % ' '.join(['%16s' % name for name in keys + metrics]))
+    for r in results:
+        case = tuple(r[key] for key in keys)
+        if case not in old:
+            continue
+        changes = ['%15.1f%%' % _change(old[case][name], r[name]) for name in metrics]
+        out.write('%s\n' % ' '.join(['%16s' % value for value in case] + changes))
+
+
+def _change(old, new):
+    return (new - old) * 100.0 / old if old else 0.0
@@ -0,0 +1,203 @@
+"""
+An on-disk cache of token streams.
+
+The compact token stream of a source (a `TokenBuffer`) is stored in a file named by
+the hash of the source and `Lexer.version`, so a source that is lexed again
+loads its tokens instead, and a new lexer version never sees the old files.
+
+A cached stream is replayed by `ReplayLexer`, which looks like a lexer to the parser:
+it gives the same tokens, locations and error prompting without scanning the source.
+
+create on '10/17/26 3:12 PM'
+"""
+import hashlib
+import marshal
+import os
+import tempfile
+from bisect import bisect_left
+
+from cinter.lexer import Lexer
+from cinter.tokens import TokenBuffer, TOKEN_BY_TYPE
+
+__author__ = 'YieldNull'
+
+_COLUMNS = ('types', 'starts', 'lengths', 'rows', 'columns', 'lexeme_ids')
+
+
+class DiskCache(object):
+    """
+    Files cached in a directory, each named by the hash of a source and the versions it depends on
+    """
+    suffix = ''  # extension of the files
+
+    def __init__(self, directory):
+        self.directory = directory
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+    def versions(self):
+        """
+        :return: the versions of the code that makes the files, a file made by other versions is never found
+        """
+        return Lexer.version,
+
+    def path(self, source):
+        """
+        The file of `source`.
+
+        A file read as str and one memory-mapped as bytes keep different offsets and columns,
+        so the kind of source is hashed as well.
+        """
+        key = ' '.join(str(version) for version in self.versions())
+        digest = hashlib.sha1(('%s %s\n' % (key, type(source).__name__)).encode('ascii'))
+        digest.update(source.encode('utf-8') if isinstance(source, str) else source)
+        return os.path.join(self.directory, digest.hexdigest() + self.suffix)
+
+    def read(self, source):
+        """
+        :return: the content of the file of `source`, None if there is none
+        """
+        try:
+            with open(self.path(source), 'rb') as f:
+                return f.read()
+        except (IOError, OSError):
+            return None
+
+    def write(self, source, data):
+        """
+        Write the file of `source`. It is written under another name first,
+        so that a run reading the cache at the same time never sees a half written one.
+        """
+        fd, tmp = tempfile.mkstemp(dir=self.directory)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp, self.path(source))
+        except (IOError, OSError):
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+
+class TokenCache(DiskCache):
+    """
+    Token streams cached in a directory
+    """
+    suffix = '.tokens'
+
+    def load(self, source):
+        """
+        :return: the TokenBuffer of `source`, None if it is not cached
+        """
+        raw = self.read(source)
+        if raw is None:
+            return None
+        try:
+            data = marshal.loads(raw)
+        except (EOFError, ValueError, TypeError):
+            return None
+        if data[0] != Lexer.version:
+            return None
+
+        buffer = TokenBuffer()
+        for name, content in zip(_COLUMNS, data[1]):
+            getattr(buffer, name).frombytes(content)
+        buffer.lexemes = data[2]
+        buffer.ended = True
+        return buffer
+
+    def store(self, source, buffer):
+        """
+        Write the TokenBuffer of `source`
+        """
+        self.write(source, marshal.dumps(
+            (Lexer.version, [getattr(buffer, name).tobytes() for name in _COLUMNS], buffer.lexemes)))
+
+    def open(self, lexer, workers=None):
+        """
+        Replay the cached tokens of the source of `lexer`,
+        or let the lexer record its tokens to cache them at the end of file.
+        :param workers: lex the source in this many processes if it is not cached, see `cinter.parallel`
+        :return: a lexer
+        """
+        buffer = self.load(lexer.source)
+        if buffer is not None:
+            return ReplayLexer(lexer, buffer)
+        if workers:
+            from cinter.parallel import lex_parallel
+
+            buffer, faults = lex_parallel(lexer, workers)
+            if not faults:
+                self.store(lexer.source, buffer)
+            return ReplayLexer(lexer, buffer, faults)
+        lexer.record(self.store)
+        return lexer
+
+
+class ReplayLexer(Lexer):
+    """
+    Give the tokens of a TokenBuffer as a lexer would give them
+    """
+
+    def __init__(self, lexer, buffer, faults=()):
+        """
+        :param lexer: the lexer whose source has been read, replaced by this one
+        :param buffer: the tokens of the source
+        :param faults: (offset, row, column, reason) of each invalid token, in the order of offset.
+                    Without recovery, the first one is reported after the tokens before it,
+                    as a lexer would do. With recovery, they are all put in `errors` at the end of file.
+        """
+        self.stdin = lexer.stdin
+        self.stdout = lexer.stdout
+        self.stderr = lexer.stderr
+        self.source = lexer.source
+        self.size = lexer.size
+        self.pos = 0
+        self.start = 0
+        self.lines = lexer.lines
+        self.errors = None
+        self.buffer = buffer
+        self.index = 0  # index of the next token to give
+        self.tokens = [None] * len(buffer.lexemes)  # token of each lexeme, shared by all its occurrences
+        self.faults = faults
+        self.stop = bisect_left(buffer.starts, faults[0][0]) if faults else -1  # tokens before the first fault
+
+    @property
+    def line(self):
+        return self.get_location()[0]
+
+    def next_token(self):
+        i = self.index
+        buffer = self.buffer
+        if i == self.stop and self.errors is None:
+            self.pos = self.faults[0][0]
+            self._print_error(self.faults[0][3])
+        if i >= len(buffer.types):
+            if self.faults and self.errors is not None:
+                self.errors[:] = [fault[1:] for fault in self.faults]
+            self.pos = self.size
+            return None
+        self.index = i + 1
+        self.start = buffer.starts[i]
+        self.pos = self.start + buffer.lengths[i]
+
+        token = TOKEN_BY_TYPE.get(buffer.types[i])  # a lexer gives the shared token too
+        if token is None:
+            lexeme_id = buffer.lexeme_ids[i]
+            token = self.tokens[lexeme_id]
+            if token is None:
+                token = self.tokens[lexeme_id] = buffer.token(i)
+        return token
+
+    def iter_tokens(self):
+        buffer = self.buffer
+        token = self.next_token()
+        while token:
+            yield token, buffer.get_location(self.index - 1)
+            token = self.next_token()
+
+    def get_location(self):
+        i = self.index - 1
+        buffer = self.buffer
+        if i >= 0 and self.pos == buffer.starts[i] + buffer.lengths[i]:  # at the end of the last token
+            return buffer.get_location(i)
+        return self.lines.locate(self.pos)
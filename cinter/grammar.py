@@ -0,0 +1,163 @@
+"""
+FIRST sets of the syntax rules in grammar.txt.
+
+A syntax rule is a line `name ::= expression`, whose name starts with a lower case letter.
+The expression is made of:
+    <KIND>          a token, named as a Kind
+    name            another syntax rule
+    a b             a sequence
+    a | b           alternatives
+    ( a )           a group
+    a? a* a+        an optional, repeated, or at least once repeated item
+
+The FIRST set of a rule is the kinds of tokens that a statement of the rule can begin with,
+so that the parser can choose a rule by the next token.
+
+create on '10/17/26 8:05 PM'
+"""
+import os
+import re
+
+from cinter.tokens import Kind
+
+__author__ = 'YieldNull'
+
+GRAMMAR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'grammar.txt')  # shipped in the package
+
+_SYMBOL = re.compile(r'\s*(<\w+>|\w+|[()|?*+])')
+
+
+class GrammarError(Exception):
+    pass
+
+
+def read_rules(path=GRAMMAR):
+    """
+    Read the syntax rules of the grammar file
+    :return: dict of rule name -> parsed expression
+    """
+    rules = {}
+    with open(path) as f:
+        for line in f:
+            name, sep, expression = line.partition('::=')
+            name = name.strip()
+            if sep and name[:1].islower():
+                rules[name] = _parse(expression.strip())
+    return rules
+
+
+def first_sets(rules=None):
+    """
+    Compute the FIRST set of every rule.
+    :param rules: rules from `read_rules`, those of grammar.txt by default
+    :return: dict of rule name -> frozenset of Kind
+    """
+    rules = read_rules() if rules is None else rules
+    first = dict((name, set()) for name in rules)
+    nullable = set()
+    changed = True
+    while changed:  # until a fixed point
+        changed = False
+        for name, expression in rules.items():
+            kinds, empty = _first(expression, first, nullable)
+            if not kinds <= first[name] or (empty and name not in nullable):
+                first[name] |= kinds
+                if empty:
+                    nullable.add(name)
+                changed = True
+    return dict((name, frozenset(kinds)) for name, kinds in first.items())
+
+
+def _first(expression, first, nullable):
+    """
+    :return: (FIRST set of expression, expression can be empty)
+    """
+    op = expression[0]
+    if op == 'kind':
+        return {expression[1]}, False
+    elif op == 'rule':
+        if expression[1] not in first:
+            raise GrammarError('undefined rule %s' % expression[1])
+        return first[expression[1]], expression[1] in nullable
+    elif op == 'seq':
+        kinds = set()
+        for item in expression[1]:
+            item_kinds, empty = _first(item, first, nullable)
+            kinds |= item_kinds
+            if not empty:
+                return kinds, False
+        return kinds, True
+    elif op == 'alt':
+        kinds = set()
+        empty = False
+        for item in expression[1]:
+            item_kinds, item_empty = _first(item, first, nullable)
+            kinds |= item_kinds
+            empty = empty or item_empty
+        return kinds, empty
+    else:  # '?', '*' or '+'
+        kinds, empty = _first(expression[1], first, nullable)
+        return kinds, empty or op != '+'
+
+
+def _parse(text):
+    """
+    Parse an expression into nested tuples:
+        ('kind', Kind), ('rule', name), ('seq', [...]), ('alt', [...]), (op, item) for op in '?*+'
+    """
+    symbols = _SYMBOL.findall(text)
+    if ''.join(symbols) != re.sub(r'\s', '', text):
+        raise GrammarError('bad expression %s' % text)
+    expression, pos = _parse_alt(symbols, 0)
+    if pos != len(symbols):
+        raise GrammarError('unexpected %s in %s' % (symbols[pos], text))
+    return expression
+
+
+def _parse_alt(symbols, pos):
+    items = []
+    while True:
+        item, pos = _parse_seq(symbols, pos)
+        items.append(item)
+        if pos < len(symbols) and symbols[pos] == '|':
+            pos += 1
+        else:
+            return (items[0] if len(items) == 1 else ('alt', items)), pos
+
+
+def _parse_seq(symbols, pos):
+    items = []
+    while pos < len(symbols) and symbols[pos] not in ('|', ')'):
+        symbol = symbols[pos]
+        if symbol == '(':
+            item, pos = _parse_alt(symbols, pos + 1)
+            if pos == len(symbols) or symbols[pos] != ')':
+                raise GrammarError('unclosed (')
+        elif symbol.startswith('<'):
+            item = ('kind', Kind[symbol[1:-1]])
+        elif symbol in ('?', '*', '+'):
+            raise GrammarError('nothing to repeat before %s' % symbol)
+        else:
+            item = ('rule', symbol)
+        pos += 1
+        if pos < len(symbols) and symbols[pos] in ('?', '*', '+'):
+            item = (symbols[pos], item)
+            pos += 1
+        items.append(item)
+    return ('seq', items), pos
+
+
+def dispatch(first, alternatives):
+    """
+    Build the table to choose among the alternatives of a rule by the next token.
+    :param first: FIRST sets from `first_sets`
+    :param alternatives: list of (rule name, parse function). Rules whose FIRST sets overlap must
+                    share one function, which looks further ahead to choose between them
+    :return: dict of Kind -> parse function
+    """
+    table = {}
+    for name, parse in alternatives:
+        for kind in first[name]:
+            if table.setdefault(kind, parse) is not parse:
+                raise GrammarError('%s and another rule both begin with %s' % (name, kind.name))
+    return table
@@ -2,10 +2,12 @@
 create on '11/14/15 11:51 AM'
 """
 from PyQt5.QtCore import pyqtSlot, QSize, QRect, Qt
-from PyQt5.QtGui import QColor, QTextFormat, QPainter, QFont, QFontMetrics
+from PyQt5.QtGui import QColor, QTextFormat, QPainter, QFont, QFontMetrics, QTextCursor
 from PyQt5.QtWidgets import QWidget, QTextEdit
 from PyQt5.QtWidgets import QPlainTextEdit
 from cinter.gui.highlighter import Highlighter
+from cinter.lexer import IncrementalLexer
+from cinter.nodes import Node, TokenNode
 
 __author__ = 'YieldNull'
 
@@ -45,6 +47,7 @@ class CodeEditor(QPlainTextEdit):
         self.updateRequest.connect(self.updateNum)
         self.cursorPositionChanged.connect(self.highlightLine)
         self.textChanged.connect(self.highlightCode)
+        self.document().contentsChange.connect(self.relex)
 
         # editor config
         font = QFont()
@@ -59,6 +62,9 @@ class CodeEditor(QPlainTextEdit):
         # highlighter
         self.highlighter = Highlighter(self.document())
 
+        # tokens of each line, relexed on each edit
+        self.lexer = IncrementalLexer()
+
         # init
         self.updateNumWidth(0)
         self.highlightLine()
@@ -66,6 +72,39 @@ class CodeEditor(QPlainTextEdit):
     def highlightCode(self):
         self.highlighter.highlightBlock(str(self.document()))
 
+    @pyqtSlot(int, int, int)
+    def relex(self, position, removed, added):
+        """
+        Relex the lines changed by an edit.
+        :param position: where the edit happens
+        :param removed: count of chars removed
+        :param added: count of chars added
+        """
+        block = self.document().findBlock(position)
+        cursor = QTextCursor(self.document())
+        cursor.setPosition(position)
+        end = min(position + added, self.document().characterCount() - 1)  # without the last paragraph separator
+        cursor.setPosition(max(end, position), QTextCursor.KeepAnchor)
+        text = cursor.selectedText().replace('\u2029', '\n')  # Qt separates paragraphs by U+2029
+        self.lexer.replace(block.blockNumber() + 1, position - block.position() + 1, removed, text)
+
+    def tokenTree(self):
+        """
+        Token tree of the document. The sub tree of a line is rebuilt only after the line is relexed.
+        :return: root node
+        """
+        root = Node('Token Tree')
+        for row, line in enumerate(self.lexer.lines, 1):
+            if not line.tokens:
+                continue
+            if line.node is None:
+                line.node = Node('')
+                for token, column in line.tokens:
+                    line.node.append(TokenNode(token))
+            line.node.cate = 'Line %d' % row
+            root.append(line.node)
+        return root
+
     def resizeEvent(self, event):
         """
         Override. Resize the editor
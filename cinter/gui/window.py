@@ -6,6 +6,7 @@ Show ui and handle events.
 create on '11/14/15 9:43 PM'
 """
 import ntpath
+from io import StringIO
 
 from cinter.inter import Interpreter
 from cinter.parser import Parser
@@ -251,16 +252,35 @@ class MainWindow(QMainWindow):
     @pyqtSlot(bool)
     def runLexer(self, checked):
         """
-        Run lexer and present result on self.ui.tabToken Tree
+        Present tokens of current editor on self.ui.tabToken Tree
+
+        The editor relexes the lines of each edit as it is made,
+        so the tokens and invalid ones are just collected here.
         :return:
         """
-        p = self.genParser(Parser.mode_lexer)
-        tokenNode = p.lexse() if p else None
-        if not tokenNode:
+        if not self.saveFile():
+            return
+        self.showOutputPanel()
+        self.ui.actionViewConsole.setChecked(True)
+        self.beginEcho()
+
+        lexer = self.currentEditor.lexer
+        errors = lexer.get_errors()
+        if errors:
+            for row, column, reason in errors:
+                self.updateOutput(lexer.format_error(row, column, reason))
             self.endEcho(False)
             return
 
-        self.showBrowserTree(self.ui.tabToken, tokenNode)
+        # the lexer analysis result, as `Parser.lexse` prints it
+        echo = StringIO()
+        for row, line in enumerate(lexer.lines, 1):
+            for i, (token, column) in enumerate(line.tokens):
+                echo.write('%s%d: %s\n' % ('' if i == 0 else '   ', row, token))
+        self.updateOutput(echo.getvalue())
+        echo.close()
+
+        self.showBrowserTree(self.ui.tabToken, self.currentEditor.tokenTree())
         self.endEcho(True)
 
     @pyqtSlot(bool)
@@ -361,7 +381,7 @@ class MainWindow(QMainWindow):
         console = Console(self.ui.console, parent=self)
         console.update.connect(self.updateOutput)
 
-        return Parser(stdin, stdout=console, stderr=console, mode=mode)
+        return Parser(stdin, stdout=console, stderr=console, mode=mode, token_tree=True)
 
     def beginEcho(self):
         self.updateOutput('%s\n' % self.currentEditor.file)
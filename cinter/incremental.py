@@ -0,0 +1,162 @@
+"""
+Per-function incremental compiling.
+
+A function is kept in a `FunctionCache` once compiled, under the hash of its source text
+from its return type to its `}`, which covers its signature as well. What is kept is:
+    codes   - its IR, made relocatable by `relative_codes`
+    globals - the type of each global symbol that the names in its body referred to
+
+When the source is compiled again by `Parser.compile_stream`, a function found in the cache,
+whose globals still have the same types, is not parsed. Its body is stepped over, it is neither
+checked nor compiled again, and its IR is relocated to the line where it lands now.
+So only the functions which are edited, and those whose callees or globals are changed, are compiled.
+
+create on '10/17/26 11:40 PM'
+"""
+import hashlib
+import sys
+from io import StringIO
+
+from cinter.inter import relative_codes, relocate_codes
+from cinter.lexer import Lexer
+from cinter.nodes import FuncDefStmtNode, InnerStmtsNode, IdNode
+from cinter.stable import STypeArray, STypeFunc
+from cinter.parser import Parser
+
+__author__ = 'YieldNull'
+
+
+def _signature(stype):
+    """
+    A value of the symbol type to compare, None if there is no symbol
+    """
+    if stype is None:
+        return None
+    elif isinstance(stype, STypeFunc):
+        return _signature(stype.stype), tuple(_signature(param) for param in stype.param_stypes)
+    elif isinstance(stype, STypeArray):
+        return stype.type.type, stype.size
+    return stype.type.type
+
+
+class CachedFunction(object):
+    """
+    A function compiled before
+    """
+
+    def __init__(self, codes, _globals):
+        self.codes = codes  # relocatable codes
+        self.globals = _globals  # name -> signature of the global symbol, when it was compiled
+
+    def reuse(self, rtype, _id, params):
+        """
+        :return: the syntax node of the function, whose body is left empty
+        """
+        return ReusedFuncDefNode(rtype, _id, params, self)
+
+
+class ReusedFuncDefNode(FuncDefStmtNode):
+    """
+    A function reused from FunctionCache.
+    Its signature is checked as that of any function, and its codes are relocated from the cached ones.
+    """
+
+    def __init__(self, rtype, _id, params, function):
+        super(ReusedFuncDefNode, self).__init__(rtype, _id, params, InnerStmtsNode([]))
+        self.function = function
+
+    def gen_code(self):
+        return relocate_codes(self.function.codes)
+
+
+class FunctionCache(object):
+    """
+    Functions compiled before, in memory
+    """
+
+    def __init__(self):
+        self.functions = {}  # digest of source text -> CachedFunction
+        self.used = set()  # digests found or stored since the last `prune`
+
+    @staticmethod
+    def digest(source):
+        return hashlib.sha1(source.encode('utf-8') if isinstance(source, str) else source).digest()
+
+    def find(self, source, stable):
+        """
+        :param source: source text of the function
+        :param stable: the root symbol table, with the symbols defined before the function
+        :return: the CachedFunction, None if it is not cached or any of its globals has been changed
+        """
+        digest = self.digest(source)
+        function = self.functions.get(digest)
+        if function is None:
+            return None
+        for name, signature in function.globals.items():
+            symbol = stable.symbol_find(name)
+            if _signature(symbol.stype if symbol else None) != signature:
+                return None
+        self.used.add(digest)
+        return function
+
+    def store(self, node, codes, stable):
+        """
+        Keep a function just compiled
+        :param node: the FuncDefStmtNode, checked without error
+        :param codes: its codes
+        :param stable: the root symbol table, in which the function is the last symbol
+        """
+        if node.source is None:  # reused, or not parsed with the cache
+            return
+
+        _globals = {}
+        stack = [node.childAt(3)]
+        while stack:
+            child = stack.pop()
+            if isinstance(child, IdNode) and child.name != node.name and child.name not in _globals:
+                symbol = stable.symbol_find(child.name)
+                _globals[child.name] = _signature(symbol.stype if symbol else None)
+            stack += child.childItems
+
+        digest = self.digest(node.source)
+        self.functions[digest] = CachedFunction(relative_codes(codes), _globals)
+        self.used.add(digest)
+
+    def prune(self):
+        """
+        Drop the functions neither found nor stored since the last call,
+        which are no longer in the source
+        """
+        for digest in list(self.functions):
+            if digest not in self.used:
+                del self.functions[digest]
+        self.used = set()
+
+
+class IncrementalCompiler(object):
+    """
+    Compile the versions of a source one after another, such as those in an editor,
+    reusing the functions that are not changed.
+    """
+
+    def __init__(self, stdout=sys.stdout, stderr=sys.stderr, engine=Lexer.engine_dfa):
+        self.stdout = stdout
+        self.stderr = stderr
+        self.engine = engine
+        self.functions = FunctionCache()
+
+    def compile(self, source):
+        """
+        Compile the whole source, errors are written to stderr as `Parser.compile` does
+        :param source: the source code
+        :return: code_list, None if there is any error
+        """
+        parser = Parser(StringIO(source), stdout=self.stdout, stderr=self.stderr, engine=self.engine,
+                        functions=self.functions)
+        codes = []
+        for part in parser.compile_stream():
+            codes += part
+        if not parser.compiled:
+            return None
+        self.functions.prune()
+        return codes
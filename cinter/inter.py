@@ -4,6 +4,11 @@ An interpreter base on `Code`
 may cause ZeroDivisionError , IndexError, ValueError
 """
 import sys
+from cinter.tokens import Name, intern_name, NAME_MAIN, NAME_READ, NAME_WRITE
+
+NAME_RA = intern_name('_ra')  # return address
+NAME_RV = intern_name('_rv')  # return value
+NAME_P0 = intern_name('_p0')  # the first param
 
 
 class Code(object):
@@ -35,7 +40,58 @@ class Code(object):
 
     @classmethod
     def gen_temp(cls):
-        return '_t%d' % (Code.line + 1)  # use code index as the temp variable index
+        return intern_name('_t%d' % (Code.line + 1))  # use code index as the temp variable index
+
+
+# bits of `relative_codes`, shifted by the index of the field in (arg1, arg2, tar)
+_REL_LINE = 1  # the field is a line number
+_REL_TEMP = 8  # the field is a temp, named after a line number
+
+
+def relative_codes(codes):
+    """
+    Make the codes of a function relocatable.
+    Line numbers that they jump or return to, and temps named after line numbers,
+    are kept relative to the first code, so that the codes can be rebuilt at any line by `relocate_codes`.
+    :return: list of (op, arg1, arg2, tar, mask), `mask` has the bits of the relative fields
+    """
+    base = codes[0].line
+    relative = []
+    for code in codes:
+        op = code.op
+        fields = [code.arg1, code.arg2, code.tar]
+        mask = 0
+        for i in range(3):
+            if isinstance(fields[i], Name) and str(fields[i]).startswith('_t'):
+                fields[i] = int(str(fields[i])[2:]) - base
+                mask |= _REL_TEMP << i
+        if op == 'f=' or (op == '=' and isinstance(code.tar, Name) and code.tar == NAME_RA):  # entrance, return address
+            fields[0] -= base
+            mask |= _REL_LINE
+        elif op[:1] == 'j':
+            fields[2] -= base
+            mask |= _REL_LINE << 2
+        relative.append((op, fields[0], fields[1], fields[2], mask))
+    return relative
+
+
+def relocate_codes(relative):
+    """
+    Build the codes from `relative_codes` again, from the next line on.
+    """
+    base = Code.line + 1
+    codes = []
+    for op, arg1, arg2, tar, mask in relative:
+        if mask:
+            fields = [arg1, arg2, tar]
+            for i in range(3):
+                if mask & (_REL_LINE << i):
+                    fields[i] += base
+                elif mask & (_REL_TEMP << i):
+                    fields[i] = intern_name('_t%d' % (fields[i] + base))
+            arg1, arg2, tar = fields
+        codes.append(Code(op, arg1, arg2, tar))
+    return codes
 
 
 class Symbol(object):
@@ -65,18 +121,14 @@ class Frame(object):
     """
 
     def __init__(self, raddress):
-        self.symbols = []
+        self.symbols = {}  # name -> symbol
         self.raddress = raddress  # return address
 
     def append(self, symbol):
-        self.symbols.append(symbol)
+        self.symbols.setdefault(symbol.name, symbol)  # the first one defined wins, as in a list
 
     def find(self, name):
-        for symbol in self.symbols:
-            if symbol.name == name:
-                return symbol
-        else:
-            return None
+        return self.symbols.get(name)
 
 
 class Interpreter(object):
@@ -87,10 +139,9 @@ class Interpreter(object):
 
         self.codes = codes  # code list to be interpreted
         self.stack = []  # stack of function frame, initializes with main Frame
-        self.globals = [  # global single value symbols
-            Symbol('_ra', Symbol.type_int, value=len(codes)),  # return address
-            Symbol('_rv', Symbol.type_real)  # return value
-        ]
+        self.globals = Frame(len(codes))  # global symbols
+        self.globals.append(Symbol(NAME_RA, Symbol.type_int, value=len(codes)))  # return address
+        self.globals.append(Symbol(NAME_RV, Symbol.type_real))  # return value
 
     @property
     def top_frame(self):
@@ -112,7 +163,7 @@ class Interpreter(object):
                     else:
                         self._handle_assign(arg1, tar)
                 elif op == 'f=':
-                    if tar == 'main':  # enter the main function
+                    if tar == NAME_MAIN:  # enter the main function
                         self.stack.append(Frame(len(self.codes)))
                         line += 2
                         continue
@@ -209,7 +260,7 @@ class Interpreter(object):
         arr = self._find(name)
         tar = self._find_or_create(tar, arr.type)
 
-        if not isinstance(index, int):  # index is a variable name
+        if isinstance(index, Name):  # index is a variable name
             index = self._find(index).value
 
         tar.value = arr.value[index]  # arr's value is a list of literal value
@@ -221,7 +272,7 @@ class Interpreter(object):
         arr = self._find(name)
         _type, value = self._gen_type_and_value(source)
 
-        if not isinstance(index, int):  # index is a variable name
+        if isinstance(index, Name):  # index is a variable name
             index = self._find(index).value
 
         if _type == Symbol.type_read:
@@ -298,13 +349,13 @@ class Interpreter(object):
         """
 
         # function return address is just set before call
-        ra = self._find('_ra').value
-        if name == 'write':
-            param = self._find('_p0').value
+        ra = self._find(NAME_RA).value
+        if name == NAME_WRITE:
+            param = self._find(NAME_P0).value
             self.stdout.write('%s\n' % str(param))
             return ra
-        elif name == 'read':
-            rv = self._find('_rv')
+        elif name == NAME_READ:
+            rv = self._find(NAME_RV)
             rv.value = self.stdin.read()
             rv.type = Symbol.type_read
 
@@ -320,7 +371,7 @@ class Interpreter(object):
         """
 
         # reset return value's type
-        rv = self._find('_rv')
+        rv = self._find(NAME_RV)
         if isinstance(rv.value, float):
             rv.type = Symbol.type_real
         else:
@@ -342,11 +393,7 @@ class Interpreter(object):
             if symbol:
                 return symbol
 
-        for symbol in self.globals:
-            if symbol.name == name:
-                return symbol
-        else:
-            return None
+        return self.globals.find(name)
 
     def _find_or_create(self, name, _type):
         """
@@ -369,9 +416,7 @@ class Interpreter(object):
         :param literal_or_name:
         :return: (Symbol type, value)
         """
-        try:
-            float(literal_or_name)
-        except ValueError:  # variable name
+        if isinstance(literal_or_name, Name):  # variable name
             s_source = self._find(literal_or_name)
             return s_source.type, s_source.value
         else:  # literal
@@ -6,20 +6,25 @@ We need to draw a DFA(Deterministic Finite Automaton) of
 the language's lexical rule first of all, because the main analysis arithmetic
 is based on it although CMM is very simple.
 
-We maintain a input buffer to enable lookahead mechanism.
-When read a useless char, put it to the input buffer, where we can read char later.
-A char is popped from the input buffer after it is read,
-and when the buffer is empty, we read from input source instead.
+The whole source is loaded into memory once and scanned by an integer offset.
+Lookahead is just an index into the source, so there is nothing to unget:
+we peek at `source[i + 1]` and only move `pos` past the chars a token consumes.
 
-To make error prompting possible, we use a counter to record the lines we have read,
-and a buffer to record what we have read in current line. But there exists a bug when
-we encounter a newline and switch to it. If we unget the '\n', we need to go back to the
-previous state, but the buffer has been cleared. So, a pre_read_buffer is used
-to record the previous line when we switch to a new line.
+To make error prompting possible, a `LineTable` records the offset at which each
+line starts. It is filled by bulk searches for '\n' ahead of the lexer, so the
+scanning loops never look at line ends. Any offset is turned into a row by
+a binary search in that table, and the column is the offset minus the row start.
 
+A memory-mapped file is not read at all: it is kept as the source and scanned
+as bytes by ByteLexer or RegexLexer, so huge files are never decoded as a whole.
 """
 
+import mmap
+import re
 import sys
+from array import array
+from io import StringIO
+from bisect import bisect_right
 import cinter.tokens as tokens
 
 __author__ = 'YieldNull'
@@ -29,20 +34,10 @@ __author__ = 'YieldNull'
 # when read from keyboard. So '\r' is left out
 _IGNORE = ['\t', '\n', ' ']
 
-
-class EOF(object):
-    """
-    When encounter EOF in stdin,return an EOF object.
-
-    A returned char by Lexer._get() will be judged by "isdigit()","isalpha()" and "=="
-    just return False to escape current DFA state
-    """
-
-    def isdigit(self):
-        return False
-
-    def isalpha(self):
-        return False
+# letters and digits are ASCII only, as in grammar.txt. `str.isalpha` and `str.isdigit` take in other scripts too
+_LETTERS = frozenset('abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ')
+_DIGITS = frozenset('0123456789')
+_ID_CHARS = _LETTERS | _DIGITS | frozenset('_')
 
 
 class InvalidTokenError(Exception):
@@ -55,11 +50,69 @@ class InvalidTokenError(Exception):
     pass
 
 
+class LineTable(object):
+    """
+    The start offset of each line in a source.
+
+    Lines are recorded lazily: asking for the location of an offset
+    records all lines up to a chunk beyond it, so that walking the source
+    from start to end searches each part of it once.
+    """
+    chunk = 1 << 16  # chars to search ahead for line ends
+
+    def __init__(self, source):
+        self.source = source
+        self.size = len(source)
+        self.newline = '\n' if isinstance(source, str) else b'\n'
+        self.starts = array('L', [0])  # start offset of each line, the row of starts[i] is i + 1
+        self.scanned = 0  # all lines starting before this offset are recorded
+
+    def locate(self, offset):
+        """
+        :return: (row, column) of the char at offset, both start from 1
+        """
+        if offset > self.scanned:
+            self._scan(min(max(offset + 1, self.scanned + self.chunk), self.size))
+        row = bisect_right(self.starts, offset)
+        return row, offset - self.starts[row - 1] + 1
+
+    def line(self, row):
+        """
+        :return: the text of the row, without its line end
+        """
+        while len(self.starts) < row and self.scanned < self.size:  # a row that is not located yet
+            self._scan(min(self.scanned + self.chunk, self.size))
+        start = self.starts[row - 1]
+        end = self.source.find(self.newline, start)
+        text = self.source[start:self.size if end == -1 else end]
+        return text if isinstance(text, str) else text.decode('utf-8', 'replace').rstrip('\r')
+
+    def _scan(self, end):
+        """
+        record the lines which start after a line end in source[scanned:end]
+        """
+        src = self.source
+        newline = self.newline
+        starts = self.starts
+        k = src.find(newline, self.scanned, end)
+        while k != -1:
+            starts.append(k + 1)
+            k = src.find(newline, k + 1, end)
+        self.scanned = end
+
+
 class Lexer(object):
+    engine_dfa = 0  # the hand-written DFA below
+    engine_regex = 1  # RegexLexer
+    engine_bytes = 2  # ByteLexer
+
+    unterminated = 'Unterminated comment'  # reason of the error at a '/*' without '*/'
+    version = 1  # bump it whenever a source may be lexed into different tokens, to drop cached ones
+
     def __init__(self, stdin, stdout=sys.stdout, stderr=sys.stderr):
         """
         Those streams will be closed at last by parser.
-        :param stdin:  the source code input stream
+        :param stdin:  the source code input stream, or a memory-mapped source file
         :param stdout: the standard output stream
         :param stderr: the standard error stream
         :return:
@@ -67,10 +120,20 @@ class Lexer(object):
         self.stdin = stdin
         self.stdout = stdout
         self.stderr = stderr
-        self.buf = []  # read buffer
-        self.line = 1  # current line
-        self.read = []  # store chars which has been read in current line
-        self.pre_read = []  # store previous read when go to newline to avoid go back
+        # the whole source code, a memory-mapped file is used in place as bytes
+        self.source = stdin if isinstance(stdin, mmap.mmap) else stdin.read()
+        self.size = len(self.source)
+        self.pos = 0  # offset of the next char to read
+        self.start = 0  # offset of the first char of the last token
+        self.lines = LineTable(self.source)
+        self.errors = None  # (row, column, reason) of each invalid token, when recovering
+
+    @property
+    def line(self):
+        """
+        current line
+        """
+        return self.lines.locate(self.pos)[0]
 
     def next_token(self):
         """
@@ -78,175 +141,648 @@ class Lexer(object):
         :return: the specific token as the type of token.Token or its subclasses,
                 None if it is the end of file
         """
-        c = self._getch()
-
-        # consume white character
-        while c in _IGNORE:
-            c = self._getch()
+        src = self.source
+        size = self.size
+        i = self.pos
+
+        # consume white characters and comments, jumping to the end of each comment at once
+        while True:
+            while i < size and src[i] in _IGNORE:
+                i += 1
+            if src[i:i + 2] == '//':
+                i = src.find('\n', i + 2)
+                if i == -1:
+                    i = size
+            elif src[i:i + 2] == '/*':
+                j = src.find('*/', i + 2)
+                if j == -1:
+                    self.pos = i
+                    self._print_error(Lexer.unterminated, resume=size)
+                i = j + 2
+            else:
+                break
 
         # end of file
-        if isinstance(c, EOF):
+        if i >= size:
+            self.pos = size
             return None
 
-        # consume comment or divide
+        c = src[i]
+        self.start = i
+
+        # divide, comments are consumed above
         if c == '/':
-            c = self._getch()
-            if c == '/':
-                while c != '\n' and not isinstance(c, EOF):
-                    c = self._getch()
-                return self.next_token()
-            elif c == '*':
-                while True:
-                    c = self._getch()
-                    after = self._getch()
-                    if c + after == '*/':
-                        break
-                    else:
-                        self._ungetc(after)
-                return self.next_token()
-            else:
-                self._ungetc(c)
-                return tokens.Token_DIVIDE
+            self.pos = i + 1
+            return tokens.Token_DIVIDE
 
         # consume identifier
-        if c.isalpha():
-            identifier = ''
-            while c.isdigit() or c.isalpha() or c == '_':
-                identifier += c
-                c = self._getch()
-
-            self._ungetc(c)
-            if identifier[len(identifier) - 1] == '_':  # ended with '_' is invalid
-                self._ungetc('_')
+        if c in _LETTERS:
+            j = i + 1
+            while j < size and src[j] in _ID_CHARS:
+                j += 1
+
+            identifier = src[i:j]
+            if identifier[-1] == '_':  # ended with '_' is invalid
+                self.pos = j - 1
                 self._print_error()
             else:
-                if identifier in tokens.TOKEN_RESERVED.keys():
+                self.pos = j
+                if identifier in tokens.TOKEN_RESERVED:
                     return tokens.TOKEN_RESERVED[identifier]
                 else:
                     return tokens.Identifier(identifier)
 
         # consume integer or decimal
-        if c.isdigit():
-            number = self._consume_int(c)
-            c = self._getch()
-            if c == '.':  # decimal
-                c = self._getch()
-                if c.isdigit():
-                    number += '.'
-                    number += self._consume_int(c, True)
-                    return tokens.RealLiteral(float(number))
+        if c in _DIGITS:
+            j = self._consume_int(i)
+            if src[j:j + 1] == '.':  # decimal
+                if src[j + 1:j + 2] in _DIGITS:
+                    j = self._consume_int(j + 1, True)
+                    self.pos = j
+                    return tokens.RealLiteral(float(src[i:j]))
                 else:
-                    self._ungetc(c)
+                    self.pos = j + 1
                     self._print_error()
             else:
-                self._ungetc(c)
-                return tokens.IntLiteral(int(number))
+                self.pos = j
+                return tokens.IntLiteral(int(src[i:j]))
 
         # consume less greater than or not equal
         if c == '<':
-            c = self._getch()
-            if c == '>':
+            if src[i + 1:i + 2] == '>':
+                self.pos = i + 2
                 return tokens.Token_NEQUAL
             else:
-                self._ungetc(c)
+                self.pos = i + 1
                 return tokens.Token_LT
 
         # consume assign or equal
         if c == '=':
-            c = self._getch()
-            if c == '=':
+            if src[i + 1:i + 2] == '=':
+                self.pos = i + 2
                 return tokens.Token_EQUAL
             else:
-                self._ungetc(c)
+                self.pos = i + 1
                 return tokens.Token_ASSIGN
 
         # consume non conflict character
-        if c in tokens.TOKEN_NON_CONF.keys():
+        if c in tokens.TOKEN_NON_CONF:
+            self.pos = i + 1
             return tokens.TOKEN_NON_CONF[c]
 
         # not match above, encounter error
-        self._ungetc(c)
+        self.pos = i
         self._print_error()
 
+    def iter_tokens(self):
+        """
+        Yield each token with its location lazily, until the end of file.
+
+        Nothing is kept once a token is yielded, so with a memory-mapped source
+        the memory used only grows by the line table, one offset a line.
+        :return: generator of (token, (row, column))
+        """
+        next_token = self.next_token
+        token = next_token()
+        while token:
+            yield token, self.lines.locate(self.pos)
+            token = next_token()
+
     def get_location(self):
-        return self.line, len(self.read) + 1
+        return self.lines.locate(self.pos)
+
+    def close(self):
+        """
+        close the input stream
+        """
+        self.stdin.close()
+
+    def enable_recovery(self):
+        """
+        Go on lexing after an invalid token instead of stopping at it.
+
+        Each invalid token is recorded in `errors` and skipped, and lexing goes on
+        from the char after it. An unterminated comment skips the rest of the file.
+        Call `report_errors` at the end to print them all.
+        """
+        self.errors = []
+        self._next_token = self.next_token
+        self.next_token = self._next_token_recovering
 
-    def _consume_int(self, c, tail=False):
+    def record(self, store):
         """
-        consume a integer and return the str format
-        :param c: the first digit of the integer as str format
+        Keep each token read in a TokenBuffer as well, and pass the buffer to `store`
+        when the end of file is reached without any invalid token.
+        :param store: function(source, buffer)
+        """
+        self.recorded = tokens.TokenBuffer()
+        self._store = store
+        self._next_token_unrecorded = self.next_token
+        self.next_token = self._next_token_recording
+
+    def report_errors(self):
+        """
+        print the recorded invalid tokens
+        :return: the list of (row, column, reason)
+        """
+        for line, offset, reason in self.errors:
+            self.stderr.write(self._format_error(line, offset, reason))
+        return self.errors
+
+    def _next_token_recovering(self):
+        while True:
+            try:
+                return self._next_token()
+            except InvalidTokenError:
+                self._resume()
+
+    def _next_token_recording(self):
+        token = self._next_token_unrecorded()
+        if token is None:
+            if not self.errors:
+                self.recorded.ended = True
+                self._store(self.source, self.recorded)
+        else:
+            self.recorded.append(token, self.start, self.pos - self.start, self.get_location())
+        return token
+
+    def _resume(self):
+        """
+        go on lexing at `pos` after it is moved, as after an invalid token
+        """
+        pass
+
+    def _consume_int(self, i, tail=False):
+        """
+        consume a integer starting at offset i
+        :param i: the offset of the first digit of the integer
         :param tail: if true,"0"<digit>+ is valid. default is false
-        :return: the integer
+        :return: the offset just after the integer
         """
-        num = ''
-        if tail is False and c == '0':
-            c = self._getch()
-            self._ungetc(c)
-            if c.isdigit():
+        src = self.source
+        if tail is False and src[i] == '0':
+            if src[i + 1:i + 2] in _DIGITS:
+                self.pos = i + 1
                 self._print_error()
             else:
-                return '0'
+                return i + 1
         else:
-            while c.isdigit():
-                num += c
-                c = self._getch()
-            self._ungetc(c)
-            return num
+            while i < self.size and src[i] in _DIGITS:
+                i += 1
+            return i
 
-    def _getch(self):
+    def _print_error(self, reason='Invalid token', resume=None):
         """
-        get char from buffer or input
+        print invalid token message, or record it when recovering
+        if wanna print error, REMEMBER TO  set `pos` to the invalid char IN ADVANCE
+        :param reason: what is wrong at `pos`
+        :param resume: the offset to go on lexing from when recovering. default is the char after `pos`
         :return:
         """
-        if len(self.buf) == 0:
-            c = self.stdin.read(1)
-            if len(c) == 0:
-                return EOF()
+        line, offset = self.get_location()
+        if self.errors is None:
+            self.stderr.write(self._format_error(line, offset, reason))
         else:
-            c = self.buf.pop()
+            self.errors.append((line, offset, reason))
+            self.pos = min(self.pos + 1, self.size) if resume is None else resume
+
+        # sys.exit(0)
+        raise InvalidTokenError()
 
-        if c == '\n':  # record current state and prepare for a new line
-            self.line += 1
-            self.pre_read = self.read
-            self.read = []
-        elif not isinstance(c, EOF):
-            self.read.append(c)
-        return c
+    def _format_error(self, line, offset, reason):
+        return format_error(line, offset, reason, self.lines.line(line))
 
-    def _ungetc(self, c):
-        """
-        put a char that was read to buffer
-        :param c: the char to unget
-        :return:
+
+def format_error(line, offset, reason, text):
+    """
+    The message of an invalid token, with the text of its line and a caret under it
+    """
+    msg = '\n%s at row %d, column %d:' % (reason, line, offset)
+    return '%s\n%s\n%s\n' % (msg, text, ' ' * (offset - 1) + '^')
+
+
+class _RegexRules(object):
+    """
+    The compiled rules of RegexLexer for one kind of source, str or bytes.
+    """
+
+    def __init__(self, kind):
+        self.kind = kind
+        self.dot = self._encode('.')
+        self.digits = self._encode('0123456789')
+        self.star = self._encode('*')
+        self.fixed = dict((self._encode(t.lexeme), t) for t in _FIXED_TOKENS)
+
+        # a file lexed as bytes is not opened in text mode, so '\r' of '\r\n' is met here
+        ws = r'[ \t\n]*' if kind is str else r'[ \t\r\n]*'
+        comment = r'//[^\n]*|/\*[\s\S]*?\*/'  # an unclosed '/*' is matched as '/' and reported
+        skip = '%s(?:(?:%s)%s)*' % (ws, comment, ws)
+        self.skip = re.compile(self._encode(skip))
+        self.master = re.compile(self._encode(self._build_master_regex(skip)))
+        self.id, self.int, self.fixed_group = [self.master.groupindex[cate] for cate in
+                                               ('ID', 'INT_LITERAL', 'FIXED')]
+
+    def _encode(self, text):
+        return text if self.kind is str else text.encode('ascii')
+
+    @staticmethod
+    def _build_master_regex(skip):
         """
-        self.buf.append(c)
-        if c == '\n':  # if unget '\n', recover to the previous state which has been recorded
-            self.line -= 1
-            self.read = self.pre_read
-            self.pre_read = []
-        elif len(self.read) > 0:
-            self.read.pop()
-
-    def read_line_rest(self):
-        # read rest chars
-        c = self._getch()
-        while c != '\n' and not isinstance(c, EOF):
-            c = self._getch()
-        if not isinstance(c, EOF):
-            self._ungetc(c)
-
-    def _print_error(self):
-        """
-        print invalid token message
-        if wanna print error, REMEMBER TO  unget a char IN ADVANCE
-        :return:
+        Build the alternation of all lexical rules with one group per kind of token.
+
+        White chars and comments before a token are matched as a prefix of the same regex,
+        so each token costs one `match()`. The prefix is wrapped in a lookahead so that
+        it is never backtracked into, which would find tokens inside a comment.
+
+        Fixed tokens come from `tokens.py`: the two-char ones are tried before the
+        one-char class, so that '==' wins over '=' and '<>' over '<'.
+        Reserved words are matched as <ID> and looked up afterwards.
         """
-        offset = len(self.read) + 1
-        msg = '\nInvalid token at row %d, column %d:' % (self.line, offset)
-        self.read_line_rest()
-        self.stderr.write('%s\n' % msg)
-        self.stderr.write('%s\n' % ''.join(self.read))
-        self.stderr.write('%s\n' % (' ' * (offset - 1) + '^'))
+        fixed = sorted([t.lexeme for t in _FIXED_TOKENS], key=len, reverse=True)
+        double = [re.escape(lexeme) for lexeme in fixed if len(lexeme) > 1]
+        single = ''.join(re.escape(lexeme) for lexeme in fixed if len(lexeme) == 1)
 
-        # sys.exit(0)
-        raise InvalidTokenError()
+        rules = [
+            ('ID', r'[A-Za-z][A-Za-z0-9_]*'),  # ended with '_' is checked after matching
+            ('REAL_LITERAL', r'(?:0|[1-9][0-9]*)\.[0-9]+'),
+            ('INT_LITERAL', r'0|[1-9][0-9]*'),
+            ('FIXED', '%s|[%s]' % ('|'.join(double), single)),
+        ]
+        return '(?=(?P<SKIP>%s))(?P=SKIP)(?:%s)' % (skip, '|'.join('(?P<%s>%s)' % rule for rule in rules))
+
+
+_FIXED_TOKENS = list(tokens.TOKEN_NON_CONF.values()) + [
+    tokens.Token_DIVIDE, tokens.Token_ASSIGN, tokens.Token_EQUAL, tokens.Token_LT, tokens.Token_NEQUAL]
+_RULES = {str: _RegexRules(str), bytes: _RegexRules(bytes)}
+
+
+class RegexLexer(Lexer):
+    """
+    Lexer engine driven by one precompiled alternation regex.
+
+    Each call matches the master regex from `pos` on and dispatches on the
+    group that matched. Input that the DFA rejects is rejected here at the same column.
+
+    The source may be str or bytes-like. A memory-mapped file is matched in place
+    and only the lexemes of identifiers are decoded.
+    """
+
+    def __init__(self, stdin, stdout=sys.stdout, stderr=sys.stderr):
+        super(RegexLexer, self).__init__(stdin, stdout=stdout, stderr=stderr)
+        self.rules = _RULES[str if isinstance(self.source, str) else bytes]
+        self._scan = self.rules.master.scanner(self.source).match  # each call goes on from the end of the last match
+
+    def next_token(self):
+        src = self.source
+        rules = self.rules
+        i = self.pos
+        m = self._scan()
+        if m is None:  # only white chars and comments left, or an invalid char after them
+            start = rules.skip.match(src, i).end()
+            self.pos = start
+            if start >= self.size:  # end of file
+                return None
+            self._print_error()
+
+        group = m.lastindex
+        start, j = m.span(group)
+        self.start = start
+        self.pos = j
+
+        if group == rules.fixed_group:
+            token = rules.fixed[m.group(group)]
+            if token is tokens.Token_DIVIDE and src[j:j + 1] == rules.star:  # '/*' without '*/'
+                self.pos = start
+                self._print_error(Lexer.unterminated, resume=self.size)
+            return token
+
+        if group == rules.id:
+            identifier = m.group(group)
+            if rules.kind is bytes:
+                identifier = identifier.decode('ascii')
+            if identifier[-1] == '_':  # ended with '_' is invalid
+                self.pos = j - 1
+                self._print_error()
+            if identifier in tokens.TOKEN_RESERVED:
+                return tokens.TOKEN_RESERVED[identifier]
+            else:
+                return tokens.Identifier(identifier)
+
+        if group == rules.int:
+            c = src[j:j + 1]
+            if c == rules.dot:  # '.' not followed by digits
+                self.pos = j + 1
+                self._print_error()
+            if c and c in rules.digits:  # leading '0'
+                self._print_error()
+            return tokens.IntLiteral(int(m.group(group)))
+
+        return tokens.RealLiteral(float(m.group(group)))
+
+    def _resume(self):
+        self._scan = self.rules.master.scanner(self.source, self.pos).match
+
+    def close(self):
+        # the scanner holds a buffer of a memory-mapped source, which can not be closed until released
+        self._scan = None
+        super(RegexLexer, self).close()
+
+
+# classes of a byte in ByteLexer
+_C_OTHER, _C_WHITE, _C_LETTER, _C_DIGIT, _C_SLASH, _C_LT, _C_EQ, _C_FIXED = range(8)
+
+
+def _build_classes():
+    classes = bytearray(256)  # non ASCII bytes are _C_OTHER, so they are invalid out of comments
+    for c in b' \t\r\n':  # a file read as bytes keeps the '\r' of '\r\n'
+        classes[c] = _C_WHITE
+    for c in b'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ':
+        classes[c] = _C_LETTER
+    for c in b'0123456789':
+        classes[c] = _C_DIGIT
+    for lexeme in tokens.TOKEN_NON_CONF:
+        classes[ord(lexeme)] = _C_FIXED
+    classes[ord('/')] = _C_SLASH
+    classes[ord('<')] = _C_LT
+    classes[ord('=')] = _C_EQ
+    return bytes(classes)
+
+
+_CLASSES = _build_classes()
+_ID_TAIL = bytes(1 if c in b'_' or _CLASSES[c] in (_C_LETTER, _C_DIGIT) else 0 for c in range(256))
+_FIXED_BY_BYTE = [tokens.TOKEN_NON_CONF.get(chr(c)) for c in range(256)]
+
+
+class ByteLexer(Lexer):
+    """
+    The DFA of Lexer run over bytes.
+
+    Indexing bytes gives an int instead of a one-char str, so each char is classified
+    by looking its class up in a 256-entry table, and nothing is allocated until a lexeme
+    is sliced out of the buffer. CMM is ASCII only, which makes that safe.
+
+    A memory-mapped file is lexed in place. A str source is encoded as UTF-8 first,
+    so its columns count bytes on lines that have non ASCII chars in comments.
+    """
+
+    def __init__(self, stdin, stdout=sys.stdout, stderr=sys.stderr):
+        super(ByteLexer, self).__init__(stdin, stdout=stdout, stderr=stderr)
+        if isinstance(self.source, str):
+            self.source = self.source.encode('utf-8')
+            self.size = len(self.source)
+            self.lines = LineTable(self.source)
+
+    def next_token(self):
+        src = self.source
+        size = self.size
+        classes = _CLASSES
+        i = self.pos
+
+        # consume white characters and comments, jumping to the end of each comment at once
+        while True:
+            while i < size and classes[src[i]] == _C_WHITE:
+                i += 1
+            if i + 1 < size and src[i] == 47:  # '/'
+                c = src[i + 1]
+                if c == 47:  # '//'
+                    i = src.find(b'\n', i + 2)
+                    if i == -1:
+                        i = size
+                    continue
+                if c == 42:  # '/*'
+                    j = src.find(b'*/', i + 2)
+                    if j == -1:
+                        self.pos = i
+                        self._print_error(Lexer.unterminated, resume=size)
+                    i = j + 2
+                    continue
+            break
+
+        # end of file
+        if i >= size:
+            self.pos = size
+            return None
+
+        cls = classes[src[i]]
+        self.start = i
+
+        # consume identifier
+        if cls == _C_LETTER:
+            tail = _ID_TAIL
+            j = i + 1
+            while j < size and tail[src[j]]:
+                j += 1
+
+            if src[j - 1] == 95:  # ended with '_' is invalid
+                self.pos = j - 1
+                self._print_error()
+            self.pos = j
+            identifier = src[i:j].decode('ascii')
+            if identifier in tokens.TOKEN_RESERVED:
+                return tokens.TOKEN_RESERVED[identifier]
+            else:
+                return tokens.Identifier(identifier)
+
+        # consume non conflict character
+        if cls == _C_FIXED:
+            self.pos = i + 1
+            return _FIXED_BY_BYTE[src[i]]
+
+        # consume integer or decimal
+        if cls == _C_DIGIT:
+            j = self._consume_int(i)
+            if j < size and src[j] == 46:  # '.', decimal
+                if j + 1 < size and classes[src[j + 1]] == _C_DIGIT:
+                    j = self._consume_int(j + 1, True)
+                    self.pos = j
+                    return tokens.RealLiteral(float(src[i:j]))
+                else:
+                    self.pos = j + 1
+                    self._print_error()
+            else:
+                self.pos = j
+                return tokens.IntLiteral(int(src[i:j]))
+
+        # divide, comments are consumed above
+        if cls == _C_SLASH:
+            self.pos = i + 1
+            return tokens.Token_DIVIDE
+
+        # consume less greater than or not equal
+        if cls == _C_LT:
+            if i + 1 < size and src[i + 1] == 62:  # '>'
+                self.pos = i + 2
+                return tokens.Token_NEQUAL
+            else:
+                self.pos = i + 1
+                return tokens.Token_LT
+
+        # consume assign or equal
+        if cls == _C_EQ:
+            if i + 1 < size and src[i + 1] == 61:  # '='
+                self.pos = i + 2
+                return tokens.Token_EQUAL
+            else:
+                self.pos = i + 1
+                return tokens.Token_ASSIGN
+
+        # not match above, encounter error
+        self.pos = i
+        self._print_error()
+
+    def _consume_int(self, i, tail=False):
+        src = self.source
+        size = self.size
+        classes = _CLASSES
+        if tail is False and src[i] == 48:  # '0'
+            if i + 1 < size and classes[src[i + 1]] == _C_DIGIT:
+                self.pos = i + 1
+                self._print_error()
+            return i + 1
+        while i < size and classes[src[i]] == _C_DIGIT:
+            i += 1
+        return i
+
+
+ENGINES = {
+    Lexer.engine_dfa: Lexer,
+    Lexer.engine_regex: RegexLexer,
+    Lexer.engine_bytes: ByteLexer,
+}
+
+
+def create_lexer(stdin, stdout=sys.stdout, stderr=sys.stderr, engine=Lexer.engine_dfa, cache=None, workers=None):
+    """
+    Create a lexer of `engine` on the input.
+
+    The DFA of Lexer works on str, so a memory-mapped file is lexed by ByteLexer instead.
+    :param cache: a `cinter.cache.TokenCache`. If the tokens of the source are cached,
+                they are replayed instead of being lexed. Otherwise they are cached once lexed.
+    :param workers: lex the whole source at once in this many processes, see `cinter.parallel`
+    """
+    if isinstance(stdin, mmap.mmap) and engine == Lexer.engine_dfa:
+        engine = Lexer.engine_bytes
+    lexer = ENGINES[engine](stdin, stdout=stdout, stderr=stderr)
+    if cache:
+        return cache.open(lexer, workers)
+    if workers:
+        from cinter.parallel import create_parallel_lexer
+
+        return create_parallel_lexer(lexer, workers)
+    return lexer
+
+
+class LexedLine(object):
+    """
+    The tokens of one line of a document, lexed by IncrementalLexer.
+    """
+
+    def __init__(self, text):
+        self.text = text
+        self.in_comment = False  # the line starts inside a '/* */' comment
+        self.ends_in_comment = False  # the line ends inside a '/* */' comment
+        self.opened = None  # column of the '/*' that is left open at the end of the line
+        self.tokens = []  # (token, column) of each token
+        self.errors = []  # (column, reason) of each invalid token
+        self.node = None  # the token tree of the line, built and kept by the editor
+
+
+class IncrementalLexer(object):
+    """
+    Keep the tokens of a document line by line, for the editor.
+
+    Tokens never span lines, so each line can be lexed on its own once we know
+    whether it starts inside a '/* */' comment. That state is kept for each line.
+    After an edit, the changed lines are relexed, and so are the lines after them
+    until one of them starts in the same state as before. Lines past that point
+    would be lexed exactly as they are, so they are kept.
+
+    Rows and columns start from 1 as in Lexer. A column is that of the char after the token.
+    """
+
+    def __init__(self, text=''):
+        self.lines = [LexedLine('')]
+        self.replace(1, 1, 0, text)
+
+    def replace(self, row, column, removed, text):
+        """
+        Replace `removed` chars starting at (row, column) by `text`, and relex what the edit affects.
+        A line end counts as one char.
+        :return: (first, last), the rows relexed
+        """
+        lines = self.lines
+        first = row - 1
+        head = lines[first].text[:column - 1]
+
+        # find where the removed chars end
+        end = first
+        column -= 1
+        while removed > len(lines[end].text) - column and end < len(lines) - 1:
+            removed -= len(lines[end].text) - column + 1
+            end += 1
+            column = 0
+        tail = lines[end].text[column + removed:]
+
+        edited = [LexedLine(t) for t in (head + text + tail).split('\n')]
+        lines[first:end + 1] = edited
+
+        # relex the edited lines, and go on until a line starts in the same state as before
+        in_comment = lines[first - 1].ends_in_comment if first > 0 else False
+        i = first
+        while i < len(lines):
+            line = lines[i]
+            if i >= first + len(edited) and line.in_comment == in_comment:
+                break
+            self._lex(line, in_comment)
+            in_comment = line.ends_in_comment
+            i += 1
+        return first + 1, i
+
+    def get_errors(self):
+        """
+        :return: (row, column, reason) of each invalid token in the document
+        """
+        errors = []
+        opened = None
+        for row, line in enumerate(self.lines, 1):
+            for column, reason in line.errors:
+                errors.append((row, column, reason))
+            if line.opened is not None:
+                opened = (row, line.opened)
+        if self.lines[-1].ends_in_comment:
+            errors.append(opened + (Lexer.unterminated,))
+        return errors
+
+    def format_error(self, row, column, reason):
+        return format_error(row, column, reason, self.lines[row - 1].text)
+
+    @staticmethod
+    def _lex(line, in_comment):
+        """
+        Lex a line which starts inside a comment or not
+        """
+        text = line.text
+        start = 0
+        line.in_comment = in_comment
+        line.ends_in_comment = False
+        line.opened = None
+        line.tokens = []
+        line.errors = []
+        line.node = None
+        if in_comment:
+            start = text.find('*/')
+            if start == -1:
+                line.ends_in_comment = True
+                return
+            start += 2
+
+        lexer = Lexer(StringIO(text))
+        lexer.pos = start
+        lexer.enable_recovery()
+        line.tokens = [(token, column) for token, (row, column) in lexer.iter_tokens()]
+        for row, column, reason in lexer.errors:
+            if reason == Lexer.unterminated:  # the comment goes on in the next line
+                line.ends_in_comment = True
+                line.opened = column
+            else:
+                line.errors.append((column, reason))
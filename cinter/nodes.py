@@ -6,7 +6,7 @@ create on '11/9/15 12:54 PM'
 from io import StringIO
 import cinter.tokens as tokens
 from cinter.stable import Symbol, STypeFunc, STable, SType, STypeArray, SUnknown, IndexMissingError
-from cinter.inter import Code
+from cinter.inter import Code, NAME_RA, NAME_RV
 
 __author__ = 'YieldNull'
 
@@ -75,25 +75,18 @@ class Node(object):
         """
         Print tree with itself as the root node using DFS.
         """
-        stack = [self]
-        stdout = StringIO.StringIO()
+        stack = [(self, '', False)]  # (node, indent of node, node is followed by a brother)
+        stdout = StringIO()
         while len(stack) > 0:
-            node = stack.pop()
-            parent = node.parent
-            indent = []  # output indent
-            while parent:
-                if parent.parent and parent.indexInParent() < parent.parent.childCount() - 1:
-                    indent.append('|     ')
-                else:
-                    indent.append('      ')
-                parent = parent.parent
-
-            indent.reverse()  # reserve children list in order to search from left to right
-            stdout.write(''.join(indent))
+            node, indent, followed = stack.pop()
+            stdout.write(indent)
             stdout.write('|----> %s\n' % str(node))
-            chilrenl = list(node.childItems)
-            chilrenl.reverse()
-            stack += chilrenl
+
+            # indent of children, a bar goes down to the brother below
+            indent += '|     ' if followed else '      '
+            last = len(node.childItems) - 1
+            for i in range(last, -1, -1):  # reserve children list in order to search from left to right
+                stack.append((node.childItems[i], indent, i < last))
         value = stdout.getvalue()
         return value
 
@@ -176,9 +169,13 @@ class LeafNode(Node):
     A leaf node which does not have a child node.
     """
 
-    def __init__(self, token):
+    def __init__(self, token, location=None):
+        """
+        :param location: (row, column) of the token, as the lexer reports it
+        """
         super(LeafNode, self).__init__(token.cate)
         self.token = token
+        self.location = location
 
     def __str__(self):
         return '%s : "%s"' % (self.token.cate, self.token.lexeme)
@@ -187,7 +184,7 @@ class LeafNode(Node):
         return self.token.lexeme
 
     def gen_location(self):
-        return self.token.get_location()
+        return self.location
 
 
 class LiteralNode(LeafNode):
@@ -195,9 +192,9 @@ class LiteralNode(LeafNode):
     A real or integer literal node.
     """
 
-    def __init__(self, token):
+    def __init__(self, token, location=None):
         assert isinstance(token, tokens.IntLiteral) or isinstance(token, tokens.RealLiteral)
-        super(LiteralNode, self).__init__(token)
+        super(LiteralNode, self).__init__(token, location)
 
     def gen_stype(self):
         if isinstance(self.token, tokens.IntLiteral):
@@ -217,8 +214,8 @@ class DataTypeNode(LeafNode):
     dataType    ::=( <INT> | <REAL> )
     """
 
-    def __init__(self, token):
-        super(DataTypeNode, self).__init__(token)
+    def __init__(self, token, location=None):
+        super(DataTypeNode, self).__init__(token, location)
         assert token in [tokens.Token_INT, tokens.Token_REAL]
 
     def gen_stype(self):
@@ -255,11 +252,11 @@ class ArrayNode(Node):
 
 
 class IdNode(LeafNode):
-    def __init__(self, _id):
+    def __init__(self, _id, location=None):
         assert isinstance(_id, tokens.Identifier)
-        super(IdNode, self).__init__(_id)
+        super(IdNode, self).__init__(_id, location)
 
-        self.name = self.token.lexeme
+        self.name = self.token.name
         self.stype = None
         self.type = None
         self.arr = None
@@ -273,12 +270,15 @@ class IdNode(LeafNode):
     def gen_symbol(self):
         return Symbol(self.name, self.gen_stype())
 
+    def gen_code(self):
+        return self.name
+
 
 class FuncId(LeafNode):
     def __init__(self, rtype, _id, params):
         assert isinstance(rtype, ReturnTypeNode)
         assert isinstance(_id, IdNode)
-        super(FuncId, self).__init__(_id.token)
+        super(FuncId, self).__init__(_id.token, _id.location)
 
         self.rtype = rtype
         self.name = _id.name
@@ -329,6 +329,7 @@ class FuncDefStmtNode(Node):
         self.append(self.funcId)
         self.append(params)
         self.append(innerStmts)
+        self.source = None  # the source text of the function, kept by the parser for `cinter.incremental`
 
     def gen_location(self):
         row, column = self.id.gen_location()
@@ -347,7 +348,7 @@ class FuncDefStmtNode(Node):
             stable.symbol_append(Symbol(param.name, param.stype), check=False)
 
     def gen_code(self):
-        codes = [Code(op='f=', arg1=Code.line + 3, tar='%s' % self.name), Code(op='j')]
+        codes = [Code(op='f=', arg1=Code.line + 3, tar=self.name), Code(op='j')]
         codes += self.childAt(2).gen_code()
         codes += self.childAt(3).gen_code()
         codes[1].tar = codes[len(codes) - 1].line + 1  # jump over function definition
@@ -442,9 +443,9 @@ class FuncDefParamList(Node):
         if self.params:
             # def and assign
             codes = [Code(op='=', arg1='_i' if self.params[i].data_type == tokens.Token_INT else '_f',
-                          tar='%s' % self.params[i].name)
+                          tar=self.params[i].name)
                      for i in range(len(self.params))]
-            codes += [Code(op='=p', arg1='_p%d' % i, tar='%s' % self.params[i].name)
+            codes += [Code(op='=p', arg1=tokens.intern_name('_p%d' % i), tar=self.params[i].name)
                       for i in range(len(self.params))]
             return codes
         else:
@@ -480,9 +481,9 @@ class FuncCallExprNode(Node):
 
     def gen_code(self):
         codes = self.params.gen_code() if self.params else []
-        codes += [Code(op='=', arg1=Code.line + 3, tar='_ra')]
-        codes.append(Code(op='c', tar='%s' % self.name))
-        codes.append(Code(op='=', arg1='_rv', tar=Code.gen_temp()))
+        codes += [Code(op='=', arg1=Code.line + 3, tar=NAME_RA)]
+        codes.append(Code(op='c', tar=self.name))
+        codes.append(Code(op='=', arg1=NAME_RV, tar=Code.gen_temp()))
         return codes
 
 
@@ -502,7 +503,7 @@ class FuncCallStmtNode(Node):
 
 class FuncCallParamList(Node):
     """
-    funcCallParamList  ::= ( expr   ( <COMMA> expr  )* | <VOID> )
+    funcCallParamList  ::= ( expression   ( <COMMA> expression  )* | <VOID> )
     """
 
     def __init__(self, params):
@@ -513,7 +514,6 @@ class FuncCallParamList(Node):
         super(FuncCallParamList, self).__init__('FuncCallParamList')
         if params:
             for param in params:
-                assert isinstance(param, ExprNode)
                 self.append(param)
 
     def gen_stype(self):
@@ -524,7 +524,7 @@ class FuncCallParamList(Node):
         for i in range(self.childCount()):
             p = self.childAt(i).gen_code()
             codes += p
-            codes.append(Code(op='p=', arg1=p[len(p) - 1].tar, tar='_p%d' % i))
+            codes.append(Code(op='p=', arg1=p[len(p) - 1].tar, tar=tokens.intern_name('_p%d' % i)))
         return codes
 
 
@@ -533,14 +533,17 @@ class ReturnStmtNode(Node):
     returnStmt      ::= <RETURN> (expression)? <SEMICOLON>
     """
 
-    def __init__(self, returnNode, expr=None):
+    def __init__(self, location, expr=None):
+        """
+        :param location: location of the <RETURN> token, in order to gen location
+        """
         super(ReturnStmtNode, self).__init__('ReturnStmt')
-        self.returnNode = returnNode  # in order to gen location
+        self.location = location
         if expr:
             self.append(expr)
 
     def gen_location(self):
-        row, column = self.returnNode.get_location()
+        row, column = self.location
         return super(ReturnStmtNode, self).gen_location() % (row, column, 'return')
 
     def gen_stable(self, stable):
@@ -549,10 +552,10 @@ class ReturnStmtNode(Node):
     def gen_code(self):
         if self.childCount() > 0:
             codes = self.childAt(0).gen_code()
-            codes.append(Code(op='=', arg1=codes[len(codes) - 1].tar, tar='_rv'))
+            codes.append(Code(op='=', arg1=codes[len(codes) - 1].tar, tar=NAME_RV))
             codes.append(Code('r'))  # Code('r', tar='_ra')
         else:
-            codes = [Code(op='=', arg1='00', tar='_rv'), Code('r')]  # Code('r', tar='_ra')
+            codes = [Code(op='=', arg1='00', tar=NAME_RV), Code('r')]  # Code('r', tar='_ra')
         return codes
 
 
@@ -805,121 +808,102 @@ class ConditionNode(Node):
         return codes
 
 
-class ExprNode(Node):
+class BinOpNode(Node):
     """
     expression  ::=	term (addOp term)*
+    term	    ::=	factor (mulOp factor)*
+
+    A binary operation, whose operands are expression nodes:
+    BinOpNode, LiteralExprNode, VarNode or FuncCallExprNode.
+    A parenthesized expression is the node of the expression itself.
+
+    Operators are left associative, so a long expression makes a long chain of left operands.
+    It is walked in a loop rather than by recursion.
     """
 
-    def __init__(self, term, addOp_term_list=None):
-        super(ExprNode, self).__init__('Expression')
-        self.append(term)
-        if addOp_term_list:
-            for pair in addOp_term_list:
-                self.append(pair[0])
-                self.append(pair[1])
+    def __init__(self, op, left, right):
+        """
+        :param op: the operator, as its lexeme
+        """
+        super(BinOpNode, self).__init__('BinOp: %s' % op)
+        self.op = op
+        self.append(left)
+        self.append(right)
+
+    def _spine(self):
+        """
+        :return: the left-most operand which is not a BinOpNode,
+                and the BinOpNodes from it up to self
+        """
+        spine = []
+        node = self
+        while isinstance(node, BinOpNode):
+            spine.append(node)
+            node = node.childItems[0]
+        spine.reverse()
+        return node, spine
 
     def gen_stype(self):
-        stypes = []
-        for i in range(0, self.childCount(), 2):
-            stypes += self.childAt(i).gen_stype()
+        """
+        :return: the stypes of all operands, from left to right
+        """
+        first, spine = self._spine()
+        stypes = first.gen_stype()
+        for node in spine:
+            stypes += node.childItems[1].gen_stype()
         return stypes
 
     def gen_code(self):
-        codes = self.childAt(0).gen_code()
-        for i in range(1, self.childCount() - 1, 2):
-            op = self.childAt(i).gen_code()
-            arg2 = self.childAt(i + 1).gen_code()
-
+        first, spine = self._spine()
+        codes = first.gen_code()
+        for node in spine:
             arg1 = codes[len(codes) - 1].tar
+            arg2 = node.childItems[1].gen_code()
             codes += arg2
-            codes.append(Code(op=op, arg1=arg1, arg2=arg2[len(arg2) - 1].tar, tar=Code.gen_temp()))
+            codes.append(Code(op=node.op, arg1=arg1, arg2=arg2[len(arg2) - 1].tar, tar=Code.gen_temp()))
         return codes
 
 
-class TermNode(Node):
-    """
-    term	::=	factor (mulOp factor)*
+class LiteralExprNode(LiteralNode):
     """
+    factor  ::= <REAL_LITERAL> | <INT_LITERAL>
 
-    def __init__(self, factor, mulOp_factor_list=None):
-        super(TermNode, self).__init__('Term')
-        self.append(factor)
-        if mulOp_factor_list:
-            for pair in mulOp_factor_list:
-                self.append(pair[0])
-                self.append(pair[1])
+    A literal as an expression
+    """
 
     def gen_stype(self):
-        stypes = []
-        for i in range(0, self.childCount(), 2):
-            stypes += self.childAt(i).gen_stype()
-        return stypes
+        return [super(LiteralExprNode, self).gen_stype()]
 
     def gen_code(self):
-        codes = self.childAt(0).gen_code()
-        for i in range(1, self.childCount() - 1, 2):
-            op = self.childAt(i).gen_code()
-            arg2 = self.childAt(i + 1).gen_code()
-
-            arg1 = codes[len(codes) - 1].tar
-            codes += arg2
-            codes.append(Code(op=op, arg1=arg1, arg2=arg2[len(arg2) - 1].tar, tar=Code.gen_temp()))
-        return codes
+        return [Code(op='=', arg1=super(LiteralExprNode, self).gen_code(), tar=Code.gen_temp())]
 
 
-class FactorNode(Node):
+class VarNode(IdNode):
     """
-    factor	::= <REAL_LITERAL> | <INT_LITERAL> | <ID> ( array )?
-                | funcCallExpr  | <LPAREN> expression <RPAREN>
+    factor  ::= <ID> ( array )?
+
+    A variable or an item of an array as an expression. The array is its only child.
     """
 
-    def __init__(self, literal=None, expr=None, _id=None, arr=None, funcCall=None):
-        super(FactorNode, self).__init__('Factor')
-        if literal:
-            self.append(literal)
-        elif expr:
-            self.append(expr)
-        elif funcCall:
-            self.append(funcCall)
-        else:
-            self.append(_id)
-            if arr:
-                self.append(arr)
+    def __init__(self, _id, location=None, arr=None):
+        super(VarNode, self).__init__(_id, location)
+        self.arr = arr
+        if arr:
+            self.append(arr)
 
     def gen_stype(self):
-        """
-        :return: a stype list
-        """
-        child = self.childAt(0)
-        if isinstance(child, IdNode):
-            arr = self.childAt(1)
-            if arr:
-                if arr.size is None:  # if arr, its size must exists
-                    raise IndexMissingError()
-                return [SUnknown(child.name, True)]
-            else:
-                return [SUnknown(child.name, False)]
-        elif isinstance(child, LiteralNode):
-            return [child.gen_stype()]
+        if self.arr:
+            if self.arr.size is None:  # if arr, its size must exists
+                raise IndexMissingError()
+            return [SUnknown(self.name, True)]
         else:
-            return child.gen_stype()  # expr or funcCall
+            return [SUnknown(self.name, False)]
 
     def gen_code(self):
-        """
-        list of codes or variable name or single literal
-        :return:
-        """
-        child = self.childAt(0)
-        if isinstance(child, IdNode):
-            arr = self.childAt(1)
-            if arr:
-                return [Code(op='=[]', arg1=child.gen_code(), arg2=arr.gen_code(), tar=Code.gen_temp())]
-            else:
-                return [Code(op='=', arg1=child.gen_code(), tar=Code.gen_temp())]
-        elif isinstance(child, LiteralNode):
-            return [Code(op='=', arg1=child.gen_code(), tar=Code.gen_temp())]
+        if self.arr:
+            return [Code(op='=[]', arg1=self.name, arg2=self.arr.gen_code(), tar=Code.gen_temp())]
         else:
-            return child.gen_code()
+            return [Code(op='=', arg1=self.name, tar=Code.gen_temp())]
 
 
 class CompNode(Node):
@@ -936,30 +920,4 @@ class CompNode(Node):
         return 'j' + self.childAt(0).gen_code()
 
     def gen_location(self):
-        return self.childAt(0).token.get_location()
-
-
-class AddNode(Node):
-    """
-    addOp	    ::=	<PLUS> | <MINUS>
-    """
-
-    def __init__(self, op):
-        super(AddNode, self).__init__('Add')
-        self.append(op)
-
-    def gen_code(self):
-        return self.childAt(0).gen_code()
-
-
-class MulNode(Node):
-    """
-    mulOp	    ::=	<TIMES> | <DIVIDE>
-    """
-
-    def __init__(self, op):
-        super(MulNode, self).__init__('Multiply')
-        self.append(op)
-
-    def gen_code(self):
-        return self.childAt(0).gen_code()
+        return self.childAt(0).location
@@ -0,0 +1,171 @@
+"""
+Lexing a huge source in a process pool.
+
+The source is split into chunks at line ends. No token spans a line end, so each chunk
+can be lexed on its own, except that it may begin inside a `/* */` comment opened by
+an earlier chunk. Workers lex every chunk as if it did not. When the chunks are merged
+in order, a chunk that turns out to begin inside a comment is fixed up by lexing it
+again in this process from the end of that comment, which only happens to a chunk
+that a comment spans into.
+
+Chunks are lexed in recovery mode, so every invalid token is known at the end. The merged
+tokens are replayed by a `ReplayLexer`, which reports the first invalid token after the
+tokens before it, or all of them when recovering, just as the sequential lexer does.
+
+create on '10/17/26 5:40 PM'
+"""
+import multiprocessing
+from io import StringIO, BytesIO
+
+from cinter.cache import ReplayLexer
+from cinter.lexer import Lexer, LineTable
+from cinter.tokens import TokenBuffer
+
+__author__ = 'YieldNull'
+
+CHUNK = 1 << 20  # least chars of a chunk
+
+
+def lex_parallel(lexer, workers=None, chunk=CHUNK):
+    """
+    Lex the source of `lexer` in a pool of `workers` processes.
+    :param lexer: a lexer whose source has been read, and which has not read any token
+    :param workers: number of processes, default is the number of CPUs
+    :param chunk: least chars of a chunk. A source that makes one chunk is lexed in this process
+    :return: (TokenBuffer, faults) as the arguments of ReplayLexer
+    """
+    source = lexer.source
+    workers = workers or multiprocessing.cpu_count()
+    engine = type(lexer)
+    spans = split(source, max(chunk, lexer.size // (workers * 4) + 1))
+
+    if len(spans) == 1:
+        return merge(source, engine, spans, map(_lex_chunk, [(engine, source, False)]))
+
+    pool = multiprocessing.Pool(workers)
+    try:
+        results = pool.imap(_lex_chunk, [(engine, source[start:end], False) for start, end in spans])
+        return merge(source, engine, spans, results)
+    finally:
+        pool.terminate()
+
+
+def create_parallel_lexer(lexer, workers=None):
+    """
+    :return: a lexer replaying the tokens of the source of `lexer` lexed in parallel
+    """
+    buffer, faults = lex_parallel(lexer, workers)
+    return ReplayLexer(lexer, buffer, faults)
+
+
+def split(source, chunk):
+    """
+    Split `source` at line ends into spans of at least `chunk` chars
+    :return: list of (start, end)
+    """
+    newline = '\n' if isinstance(source, str) else b'\n'
+    spans = []
+    start = 0
+    size = len(source)
+    while start < size:
+        end = source.find(newline, min(start + chunk, size) - 1)
+        end = size if end == -1 else end + 1
+        spans.append((start, end))
+        start = end
+    return spans or [(0, 0)]
+
+
+def merge(source, engine, spans, results):
+    """
+    Merge the results of `_lex_chunk` in order, fixing up the chunks that begin inside a comment
+    :return: (TokenBuffer, faults)
+    """
+    newline = '\n' if isinstance(source, str) else b'\n'
+    buffer = TokenBuffer()
+    faults = []
+    row_base = 0  # lines before the chunk
+    opened = None  # offset of the '/*' left open by the chunks before
+    for (start, end), result in zip(spans, results):
+        if opened is not None:  # the chunk begins inside a comment
+            result = _lex_chunk((engine, source[start:end], True))
+        _append(buffer, start, row_base, result)
+        for offset, row, column, reason in result[7]:
+            faults.append((start + offset, row_base + row, column, reason))
+
+        if result[8] is not None:  # a comment is opened and left open by the chunk
+            opened = start + result[8]
+        elif not result[9]:  # the chunk ends out of comments
+            opened = None
+        row_base += source[start:end].count(newline)  # a memory-mapped file can not count
+
+    if opened is not None:  # a comment is never closed, the lexer reports it at its '/*'
+        row, column = LineTable(source).locate(opened)
+        faults.append((opened, row, column, Lexer.unterminated))
+    buffer.ended = True
+    return buffer, faults
+
+
+def _append(buffer, start, row_base, result):
+    """
+    Append the tokens of a chunk starting at `start` to `buffer`,
+    moving offsets and rows, and interning the lexemes again.
+    """
+    types, starts, lengths, rows, columns, lexeme_ids, lexemes = result[:7]
+    index = buffer._lexeme_index
+    ids = []
+    for lexeme in lexemes:
+        lexeme_id = index.get(lexeme)
+        if lexeme_id is None:
+            lexeme_id = index[lexeme] = len(buffer.lexemes)
+            buffer.lexemes.append(lexeme)
+        ids.append(lexeme_id)
+
+    buffer.types.frombytes(types)
+    buffer.lengths.frombytes(lengths)
+    buffer.columns.frombytes(columns)
+    buffer.starts.extend([offset + start for offset in _column(starts)])
+    buffer.rows.extend([row + row_base for row in _column(rows)])
+    buffer.lexeme_ids.extend([ids[i] for i in _column(lexeme_ids)])
+
+
+def _column(content):
+    column = TokenBuffer().starts
+    column.frombytes(content)
+    return column
+
+
+def _lex_chunk(args):
+    """
+    Lex a chunk in recovery mode. Run in workers, so it only takes and gives plain data.
+    :param args: (lexer class, chunk text, the chunk begins inside a comment)
+    :return: the columns of the TokenBuffer as bytes, its lexemes,
+            (offset, row, column, reason) of each invalid token,
+            offset of the '/*' left open at the end or None, the chunk is all in one comment
+    """
+    engine, text, in_comment = args
+    lexer = engine(StringIO(text) if isinstance(text, str) else BytesIO(text))
+    buffer = TokenBuffer()
+    through = False
+    if in_comment:
+        end = lexer.source.find('*/' if isinstance(lexer.source, str) else b'*/')
+        through = end == -1
+        lexer.pos = lexer.size if through else end + 2
+        lexer._resume()
+
+    lexer.enable_recovery()
+    while buffer.read(lexer):
+        pass
+
+    faults = []
+    opened = None
+    starts = lexer.lines.starts
+    for row, column, reason in lexer.errors:
+        offset = starts[row - 1] + column - 1
+        if reason == Lexer.unterminated:  # closed in a later chunk, or reported when merging
+            opened = offset
+        else:
+            faults.append((offset, row, column, reason))
+
+    return tuple(getattr(buffer, name).tobytes() for name in (
+        'types', 'starts', 'lengths', 'rows', 'columns', 'lexeme_ids')) + (
+               buffer.lexemes, faults, opened, through)
@@ -1,13 +1,17 @@
 """
 Using a recursive descent parser for analysing.
+Nested blocks and expressions are parsed on explicit stacks instead of by recursion,
+so that deeply nested code does not overflow Python stack.
 
-Similar to lexer, a reading buffer is set.
-We can `get` a token from lexer and `unget` it to the buffer.
+Tokens read from lexer are kept in a `TokenBuffer` and the parser walks it by index.
+We can `get` the next token, reading it from lexer when the buffer runs out,
+and `unget` it by stepping the index back.
 
 When parsing,
-`expect(token)` means that the following token must be the same as the provided one,
+`expect(kind)` means that the following token must be of the provided Kind,
     or it would raise an error.
-`match(token)` means we expect a token but return None instead of raising an error when mismatching.
+`match(kind)` means we expect a token but return False instead of raising an error when mismatching.
+`expect_any(kinds)` and `match_any(kinds)` do the same with a KindSet.
 
 In Parser:
     _parse_* (check=False) means that
@@ -27,15 +31,32 @@ To connect with GUI, we need to redirect std streams.
 
 create on '10/5/15 10:36 PM'
 """
-import copy
+import mmap
+import os
 import sys
+from types import GeneratorType
 from cinter.tokens import *
 from cinter.nodes import *
 from cinter.stable import STable, SemanticsError
-from cinter.lexer import Lexer, InvalidTokenError
+from cinter.lexer import Lexer, InvalidTokenError, create_lexer, format_error
+from cinter.cache import TokenCache
+from cinter.treecache import TreeCache
+from cinter.grammar import first_sets, dispatch
 
 __author__ = 'YieldNull'
 
+# kinds of tokens expected at some points of the grammar, in the order to prompt them
+KINDS_DATA_TYPE = KindSet(Kind.INT, Kind.REAL)
+KINDS_RETURN_TYPE = KindSet(Kind.INT, Kind.REAL, Kind.VOID)
+KINDS_LITERAL = KindSet(Kind.INT_LITERAL, Kind.REAL_LITERAL)
+KINDS_FACTOR = KindSet(Kind.REAL_LITERAL, Kind.INT_LITERAL, Kind.ID, Kind.LPAREN)
+KINDS_DECLARE_EXPR = KindSet(Kind.INT_LITERAL, Kind.REAL_LITERAL, Kind.ID, Kind.LPAREN)  # an arrayInit of a non-array
+KINDS_ARRAY_INDEX = KindSet(Kind.INT_LITERAL, Kind.ID)
+KINDS_COMP_OP = KindSet(Kind.LT, Kind.GT, Kind.EQUAL, Kind.NEQUAL)
+
+# binding power of each binary operator, the higher binds the tighter
+_BINDING_POWER = {Kind.PLUS: 1, Kind.MINUS: 1, Kind.TIMES: 2, Kind.DIVIDE: 2}
+
 
 def _read_keyboard():
     """
@@ -56,13 +77,19 @@ def _read_keyboard():
     return StringIO(content)
 
 
-def _read_file(path):
+def _read_file(path, mapped=False):
     """
     read source from file
     :param path: path to file
+    :param mapped: memory-map the file instead of opening it in text mode
     :return:
     """
-    return open(path, 'rU')
+    if mapped:
+        with open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size > 0:  # an empty file can not be mapped
+                return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return StringIO()
+    return open(path, 'r')
 
 
 class Parser(object):
@@ -72,106 +99,168 @@ class Parser(object):
     mode_compile = 3
     mode_execute = 4
 
-    def __init__(self, stdin, stdout=sys.stdout, stderr=sys.stderr, mode=mode_execute):
+    version = 1  # bump it whenever a source may be parsed into a different syntax tree, to drop cached ones
+
+    def __init__(self, stdin, stdout=sys.stdout, stderr=sys.stderr, mode=mode_execute, engine=Lexer.engine_dfa,
+                 cache=None, workers=None, token_tree=False, functions=None, trees=None):
         """
         Those streams will be closed at last.
-        :param stdin: the source code input stream
+        :param stdin: the source code input stream, or a memory-mapped file from `_read_file`
         :param stdout: the standard output stream
         :param stderr: the standard error stream
         :param mode: mode
+        :param engine: lexer engine, Lexer.engine_dfa, Lexer.engine_regex or Lexer.engine_bytes
+        :param cache: a `cinter.cache.TokenCache` to load the tokens from, or to store them to
+        :param workers: number of processes to lex the source in, for huge sources
+        :param token_tree: give the token tree along with the results of parsing, for a view of it.
+                    It is built from the token buffer after parsing, nothing is built if not needed.
+        :param functions: a `cinter.incremental.FunctionCache` of functions compiled before.
+                    With `compile_stream`, the bodies of those found in it are neither parsed nor compiled again
+        :param trees: a `cinter.treecache.TreeCache` to load the syntax tree from by `parse`, or to store it to
         """
         self.stdin = stdin
         self.stdout = stdout
         self.stderr = stderr
-        self.lexer = Lexer(stdin, stdout=stdout, stderr=stderr)
+        self.lexer = create_lexer(stdin, stdout=stdout, stderr=stderr, engine=engine, cache=cache,
+                                  workers=workers)
+        self.tokens = self.lexer.iter_tokens()
 
         self.mode = mode
+        self.token_tree = token_tree
+        self.functions = functions
+        self.trees = trees
 
         self.tokenTree = TokenTree()
         self.rootNode = None
         self.stable = STable()
-        self.ahead = None  # The token just read
-        self.buff = []  # unget buffer
+        self.buffer = TokenBuffer()  # tokens read from lexer
+        self.index = 0  # index of the next token to get in buffer
+        self.aheadIndex = -1  # index of the token just read in buffer
+        self._ahead = None  # the token just read, built on demand
+        self.kind = None  # kind of the token just read, None if it is the end of file
         self.currentLine = 0  # controller for printing lexer analysis result
+        self.errors = None  # (row, column, message) of each syntax error, when parsing with recovery
+        self.compiled = False  # the whole source is compiled without error by `compile_stream`
 
-    def lexse(self):
+    def lexse(self, tree=True, recover=False):
         """
         Run lexer
-        :return: token_tree_root_node
+        :param tree: build the token tree and print the result when all tokens are valid.
+                    If False, print each token as soon as it is read (in mode_lexer) and keep nothing in memory.
+        :param recover: go on after invalid tokens and print them all at the end,
+                    so that a file is checked in one run
+        :return: token_tree_root_node, or True if not `tree`. None if an invalid token is found
         """
-        echo = StringIO()
-        self.ahead = self.lexer.next_token()
-        while self.ahead:
-            echo.write(self._build_token_tree())
+        if recover:
+            self.lexer.enable_recovery()
+
+        if not tree:
             try:
-                self.ahead = self.lexer.next_token()
+                echo = self.mode == Parser.mode_lexer
+                for token, (row, column) in self.tokens:
+                    new_line = row != self.currentLine
+                    self.currentLine = row
+                    if echo:
+                        self.stdout.write(self._echo_token(token, new_line))
             except InvalidTokenError:
-                return
+                return None
+            return None if recover and self.lexer.report_errors() else True
+
+        echo = StringIO()
+        try:
+            for token, location in self.tokens:
+                echo.write(self._build_token_tree(token))
+        except InvalidTokenError:
+            return None
+        if recover and self.lexer.report_errors():
+            return None
         self.stdout.write(echo.getvalue())
         echo.close()
         return self.tokenTree.rootNode
 
-    def parse(self):
+    def parse(self, recover=False):
         """
         Run parser
-        :return: syntax_tree_root_node,token_tree_root_node
-        """
+        :param recover: go on after invalid tokens and syntax errors, and print them all at the end.
+                    A statement with a syntax error is left out of the syntax tree, see `_synchronize`.
+                    The errors are kept in `errors`, and the partial syntax tree is still returned.
+        :return: syntax_tree_root_node,token_tree_root_node (None if not `token_tree`)
+        """
+        if recover:
+            self.errors = []
+            self.lexer.enable_recovery()
         try:
-            self.rootNode = self._parse_exter_stmts()
+            if self.trees is not None and not self.token_tree:
+                self.rootNode = self.trees.load(self.lexer.source)  # only a tree without errors is cached
+            if self.rootNode is None:
+                self.rootNode = self._parse_exter_stmts()
+                if self.trees is not None and not (self.errors or self.lexer.errors):
+                    self.trees.store(self.lexer.source, self.rootNode)
         except InvalidTokenError:
             return None
         else:
-            if self.mode == Parser.mode_parser:
+            if recover:
+                self.errors = self.report_errors()
+            if self.mode == Parser.mode_parser and not self.errors:
                 self.stdout.write('%s\n' % self.rootNode.gen_tree())
-            return self.rootNode, self.tokenTree.rootNode
+            return self.rootNode, self.gen_token_tree() if self.token_tree else None
         finally:
-            self.stdin.close()
+            self.lexer.close()
+
+    def report_errors(self):
+        """
+        print the invalid tokens and syntax errors recorded when parsing with `recover`, in the order of location
+        :return: the list of (row, column, message)
+        """
+        lines = self.lexer.lines
+        errors = [(row, column, format_error(row, column, reason, lines.line(row)))
+                  for row, column, reason in self.lexer.errors]
+        errors = sorted(errors + self.errors, key=lambda error: error[:2])
+        # the end of file is reached by each block left open, report an error once
+        errors = [error for i, error in enumerate(errors) if i == 0 or error[:2] != errors[i - 1][:2]]
+        for row, column, message in errors:
+            self.stderr.write(message)
+        return errors
 
-    def semantic(self):
+    def semantic(self, recover=False):
         """
         Semantic analysing using DFS.
+        :param recover: parse with `recover`. A partial syntax tree is analysed as well,
+                    but None is returned if there is any syntax error
         :return: root_stable, root_node, root_token_node
         """
 
         # do parse first
-        parse_result = self.parse()
+        parse_result = self.parse(recover)
         if not parse_result:
             return None
 
-        # add `read` and `write` function to stable
-        self.stable.symbol_append(Symbol('read', STypeFunc(SType(tokens.Token_INT), [])))
-        self.stable.symbol_append(Symbol('write', STypeFunc(SType(tokens.Token_VOID), [SType(Token_INT)])))
+        self._declare_builtins()
 
-        stack = [(self.rootNode, self.stable)]  # the node and the direct symbol table which it is in
-        while len(stack) > 0:
-            node, stable = stack.pop()
-            try:
-                table = node.gen_stable(stable)
-            except SemanticsError as e:
-                self.stderr.write('%s %s\n' % (str(e), node.gen_location()))
-                return None
-            else:
-                children = list(node.childItems)
-                children.reverse()
-                children = [(child, table or stable) for child in children]
-                stack += children
+        error = self._check(self.rootNode)
+        if error:
+            self.stderr.write(error)
+            return None
 
         # check main function
         error = self.stable.check_main()
         if error:
             self.stderr.write('%s\n' % error)
             return None
+        elif self.errors:  # syntax errors, reported by parse
+            return None
         elif self.mode == Parser.mode_stable:
             self.stdout.write(self.stable.gen_tree())
 
         return self.stable, parse_result[0], parse_result[1]
 
-    def compile(self):
+    def compile(self, recover=False):
         """
         Gen Intermediate code
+        :param recover: report all syntax errors, see `semantic`
         :return: code_list, root_stable, root_node, root_token_node
         """
-        result = self.semantic()
+        result = self.semantic(recover)
         if not result:
             return None
 
@@ -184,209 +273,472 @@ class Parser(object):
 
         return codes, result[0], result[1], result[2]
 
+    def compile_stream(self, recover=False):
+        """
+        Gen Intermediate code in a pipeline, declaration by declaration.
+
+        Each global declaration or function is analysed and compiled as soon as it is parsed,
+        then its syntax tree, tokens and local symbol tables are dropped. So the memory used is
+        bounded by the largest function instead of the whole program. Neither the token tree nor
+        the syntax tree of the whole program is built, and the mode is not echoed.
+
+        Errors are written to stderr the same as `compile` does. Once one is found,
+        no more codes are yielded, but the rest is still parsed for syntax errors, which come first.
+        The codes can be run only if `compiled` is True at the end.
+        :param recover: go on parsing after syntax errors to report them all, see `parse`
+        :return: a generator of the code list of each declaration and function
+        """
+        self.compiled = False
+        if recover:
+            self.errors = []
+            self.lexer.enable_recovery()
+
+        self._declare_builtins()
+        Code.line = -1
+
+        error = None  # the first semantic error
+        try:
+            for stmt in self._iter_exter_stmts():
+                if error is None:
+                    error = self._check(stmt)
+                    if error is None and not self.errors:
+                        codes = stmt.gen_code()
+                        if self.functions is not None and isinstance(stmt, FuncDefStmtNode):
+                            self.functions.store(stmt, codes, self.stable)
+                        yield codes
+                del self.stable.children[:]  # local tables of the function
+                del self.stable.children_tsindex[:]
+                self._discard_tokens()
+            if recover:
+                self.errors = self.report_errors()
+        except InvalidTokenError:
+            return
+        finally:
+            self.lexer.close()
+
+        if error is None:
+            main = self.stable.check_main()
+            error = '%s\n' % main if main else None
+        if error:
+            self.stderr.write(error)
+        elif not self.errors:
+            self.compiled = True
+
+    def _declare_builtins(self):
+        """
+        add `read` and `write` function to stable
+        """
+        self.stable.symbol_append(Symbol(NAME_READ, STypeFunc(SType(tokens.Token_INT), [])))
+        self.stable.symbol_append(Symbol(NAME_WRITE, STypeFunc(SType(tokens.Token_VOID), [SType(Token_INT)])))
+
+    def _check(self, node):
+        """
+        Semantic analysing of the syntax tree of `node` using DFS, in the root symbol table.
+        :return: the message of the first error, None if no error is found
+        """
+        stack = [(node, self.stable)]  # the node and the direct symbol table which it is in
+        while len(stack) > 0:
+            node, stable = stack.pop()
+            try:
+                table = node.gen_stable(stable)
+            except SemanticsError as e:
+                return '%s %s\n' % (str(e), node.gen_location())
+            else:
+                children = list(node.childItems)
+                children.reverse()
+                children = [(child, table or stable) for child in children]
+                stack += children
+        return None
+
+    @property
+    def ahead(self):
+        """
+        The token just read, with its location set. None if it is the end of file
+        """
+        if self._ahead is None and self.aheadIndex < len(self.buffer.types):
+            self._ahead = self.buffer.token(self.aheadIndex)
+        return self._ahead
+
+    @property
+    def location(self):
+        """
+        The location of the token just read, which is kept in the buffer instead of the token
+        """
+        return self.buffer.get_location(self.aheadIndex)
+
+    def _advance(self):
+        """
+        Move to the next token, reading it from lexer if the buffer runs out.
+        :return: the type of the token, None if it is the end of file
+        """
+        i = self.index
+        types = self.buffer.types
+        if i == len(types) and not self.buffer.ended:
+            self.buffer.read(self.lexer)
+
+        if i != self.aheadIndex:
+            self.aheadIndex = i
+            self._ahead = None
+            self.kind = types[i] if i < len(types) else None
+        self.index = i + 1  # the end of file is also stepped over, so that it can be ungot
+        return self.kind
+
+    def _peek(self, k=1):
+        """
+        Look ahead at the k-th token from the next one, without moving to it.
+        Tokens are read from lexer into the buffer as needed, so that they are got later from there.
+        :return: the type of the token, None if it is beyond the end of file
+        """
+        i = self.index + k - 1
+        types = self.buffer.types
+        while i >= len(types) and not self.buffer.ended:
+            self.buffer.read(self.lexer)
+        return types[i] if i < len(types) else None
+
     def _get(self):
         """
-        get one token from lexer.
+        get one token
         :return:
         """
-        if len(self.buff) == 0:
-            self.ahead = self.lexer.next_token()
-            if self.ahead:  # set token location
-                self.ahead = copy.copy(self.ahead)  # copy the token to make difference
-                self.ahead.set_location(self.lexer.get_location())
-            self._build_token_tree()
-        else:
-            self.ahead = self.buff.pop()
+        self._advance()
         return self.ahead
 
-    def _unget(self, t=None):
+    def _unget(self):
         """
-        put current token to buff
+        put back the last token read, so that it is the next one to read again.
+        Called again, it puts back the token before it, and so on
         :return:
         """
-        self.buff.append(t or self.ahead)
+        self.index -= 1
 
-    def _match(self, t):
+    def _match(self, kind):
         """
-        Check if the next token matches t or not.
-        If not match, unget current token.
-        :param t: single token or token list
+        Check if the next token is of `kind` or not.
+        The token is read either way, unget it if it does not match.
+        :param kind: a Kind
         :return:
         """
-        if isinstance(t, Token):
-            t = (t,)
-        self._get()
-        if self.ahead and self.ahead.type in [tp.type for tp in t]:
-            return True
-        else:
-            return False
+        return self._advance() == kind
 
-    def _expect(self, t):
+    def _match_any(self, kinds):
         """
-        expect next token to be t (or int a list of t).
-        if not, raise an error
-        :param t:
+        Check if the next token is of one of `kinds` or not, as `_match` does.
+        :param kinds: a KindSet
         :return:
         """
-        if not self._match(t):
-            self._print_error(t)
-        else:
-            return self.ahead
+        return self._advance() in kinds
+
+    def _expect(self, kind):
+        """
+        expect next token to be of `kind`.
+        if not, raise an error
+        :param kind: a Kind
+        :return: the token
+        """
+        if self._advance() != kind:
+            self._print_error(kind)
+        return self.ahead
 
-    def _build_token_tree(self):
+    def _expect_any(self, kinds):
         """
-        Build token tree and print the lexer analysis result when each _get()
+        expect next token to be of one of `kinds`.
+        if not, raise an error
+        :param kinds: a KindSet
+        :return: the token
+        """
+        if self._advance() not in kinds:
+            self._print_error(kinds)
+        return self.ahead
+
+    def gen_token_tree(self):
+        """
+        Build the token tree of the tokens read, one sub tree for each line,
+        as `lexse` does when reading them
+        :return: token_tree_root_node
+        """
+        tree = TokenTree()
+        buffer = self.buffer
+        rows = buffer.rows
+        line = 0
+        for i in range(len(buffer)):
+            if rows[i] != line:
+                line = rows[i]
+                tree.newLine('Line %d' % line)
+            tree.append(TokenNode(buffer.token(i)))
+        if buffer.ended and self.lexer.line != line:  # the line of the end of file
+            tree.newLine('Line %d' % self.lexer.line)
+        return tree.rootNode
+
+    def _build_token_tree(self, token):
+        """
+        Build token tree and print the lexer analysis result when each token is read from lexer
+        :param token: the token read, None if it is the end of file
         :return:
         """
-        echo = ''
-        if self.lexer.line != self.currentLine:
+        new_line = self.lexer.line != self.currentLine
+        if new_line:
             self.currentLine = self.lexer.line
             self.tokenTree.newLine('Line %d' % self.currentLine)
-            if self.mode == Parser.mode_lexer:
-                echo = '%s\n' % '%d: %s' % (self.currentLine, self.ahead)
-        elif self.mode == Parser.mode_lexer:
-            echo = '%s\n' % '   %d: %s' % (self.currentLine, self.ahead)
+        echo = self._echo_token(token, new_line) if self.mode == Parser.mode_lexer else ''
 
-        if self.ahead:
-            self.tokenTree.append(TokenNode(self.ahead))
+        if token:
+            self.tokenTree.append(TokenNode(token))
         return echo
 
+    def _echo_token(self, token, new_line):
+        """
+        The lexer analysis result of a token
+        :param new_line: the token is the first one in current line
+        :return:
+        """
+        if new_line:
+            return '%d: %s\n' % (self.currentLine, token)
+        else:
+            return '   %d: %s\n' % (self.currentLine, token)
+
     def _print_error(self, expect=None):
         """
-        Print error if not match grammer
-        :param expect:
+        Print error if not match grammer, or record it when recovering
+        :param expect: the Kind or KindSet expected
         :return:
         """
-        line, offset = self.lexer.get_location()
-        offset -= len(self.ahead.lexeme) if self.ahead else 0
+        if 0 <= self.aheadIndex < len(self.buffer.types):
+            # from the buffer, as the lexer may have read further, see `_skip_block`
+            line, offset = self.location
+            offset -= len(self.ahead.lexeme)
+        else:  # the end of file
+            line, offset = self.lexer.get_location()
         msg = '\nInvalid token near row %d, column %d:' % (line, offset)
-        self.lexer.read_line_rest()
 
-        self.stderr.write('%s\n' % msg)
-        self.stderr.write('%s\n' % ''.join(self.lexer.read))
-        self.stderr.write('%s' % ' ' * (offset - 1) + '^')
-        if isinstance(expect, Token):
-            expect = (expect,)
+        message = '%s\n%s\n%s' % (msg, self.lexer.lines.line(line), ' ' * (offset - 1) + '^')
         if expect:
-            self.stderr.write('%s\n' % 'Expected %s' % (' or '.join([t.cate for t in expect])))
+            expect = expect.order if isinstance(expect, KindSet) else (expect,)
+            message += 'Expected %s\n' % (' or '.join([kind.name for kind in expect]))
+        if self.errors is None:
+            self.stderr.write(message)
+        else:
+            self.errors.append((line, offset, message))
         # sys.exit(0)
         raise InvalidTokenError()
 
+    def _synchronize(self, start, top=False):
+        """
+        Panic mode: skip tokens from the invalid one to where parsing can go on.
+
+        A `;` ends the statement and is skipped, and a `{ }` block is skipped as a whole,
+        along with the `else` block after it.
+        A block which the statement opened before the invalid token, such as an arrayInit,
+        is skipped to its `}`, along with a `;` after it. A `;` in it ends the statement too.
+        A `}` which closes the enclosing block is left to it. At top level, where no block encloses,
+        each `}` is skipped, and a type keyword begins the next statement.
+        :param start: index in buffer of the first token of the statement
+        :param top: the statement is at top level
+        """
+        opened = 0  # blocks the statement opened before the invalid token
+        for kind in self.buffer.types[start:self.aheadIndex]:
+            if kind == Kind.LBRACE:
+                opened += 1
+            elif kind == Kind.RBRACE and opened > 0:
+                opened -= 1
+
+        depth = 0  # blocks opened by the tokens skipped
+        self.index = self.aheadIndex  # back to the invalid token
+        while True:
+            kind = self._peek()
+            if kind is None:
+                return
+            if depth == 0:
+                if kind == Kind.SEMICOLON:
+                    self._advance()
+                    return
+                if kind == Kind.RBRACE and opened > 0:
+                    self._advance()
+                    opened -= 1
+                    if opened == 0:
+                        if self._peek() == Kind.SEMICOLON:
+                            self._advance()
+                        return
+                    continue
+                if (kind == Kind.RBRACE and not top) or (top and kind in KINDS_RETURN_TYPE):
+                    return
+            if kind == Kind.LBRACE:
+                depth += 1
+            elif kind == Kind.RBRACE and depth > 0:
+                depth -= 1
+                if depth == 0 and opened == 0:
+                    self._advance()
+                    kind = self._peek()
+                    if kind == Kind.SEMICOLON:
+                        self._advance()
+                    if kind != Kind.ELSE:
+                        return
+            self._advance()
+
     def _parse_exter_stmts(self):
         """
-        exterStmts  ::= ( declareStmt | FuncDefStmt)*
+        exterStmts  ::= ( declareStmt | funcDefStmt )*
 
         The beginning of parsing.
+        """
+        return ExterStmtsNode(list(self._iter_exter_stmts()))
 
-        Judge which stmt to parse in the loop.
+    def _iter_exter_stmts(self):
+        """
+        Parse exterStmts one by one, each is yielded as soon as it is parsed.
+        """
+        while True:
+            kind = self._peek()
+            if kind is None:
+                return
+            start = self.index
+            try:
+                # a token out of the table is reported as the data type expected
+                stmt = _EXTER_STMTS.get(kind, Parser._parse_stmt_declare)(self)
+            except InvalidTokenError:
+                if self.errors is None:
+                    raise
+                self._synchronize(start, top=True)
+            else:
+                yield stmt
+
+    def _discard_tokens(self):
+        """
+        Drop the tokens before the next one from the buffer, when no statement being parsed refers to them.
+        """
+        count = self.index
+        self.buffer.discard(count)
+        self.index -= count
+        self.aheadIndex -= count
+
+    def _parse_exter_stmt(self):
+        """
+        Judge which stmt to parse by looking ahead.
             declare ::= dataType (array)? <ID>  ( <COMMA> <ID> )* <SEMICOLON>
             VS
             funcDef  ::= (<VOID>  | dataType)  <ID>  <LPAREN> ( funcDefParamList )?  <RPAREN> ...
         """
-
-        stmts = []
-
-        while self._get():
-            self._unget()
-            if self.ahead == Token_VOID:
-                stmts.append(self._parse_stmt_func_def())
-            else:
-                _type = self._parse_data_type()
-                m = self._match(Token_LBRACKET)
-                self._unget()
-                if m:
-                    self._unget(_type.token)
-                    stmts.append(self._parse_stmt_declare())
-                else:
-                    _id = IdNode(self._expect(Token_Identifier))
-                    m = self._match(Token_LPAREN)
-                    self._unget()
-                    self._unget(_id.token)
-                    self._unget(_type.token)
-                    if m:
-                        stmts.append(self._parse_stmt_func_def())
-                    else:
-                        stmts.append(self._parse_stmt_declare())
-        return ExterStmtsNode(stmts)
+        if self._peek() == Kind.VOID or (self._peek(2) == Kind.ID and self._peek(3) == Kind.LPAREN):
+            return self._parse_stmt_func_def()
+        return self._parse_stmt_declare()
 
     def _parse_stmt_func_def(self):
         """
         funcDefStmt ::= returnType  <ID>  <LPAREN> ( funcDefParamList )?  <RPAREN> <LBRACE> innerStmts <RBRACE>
+
+        With `functions`, the body of a function found in it is stepped over.
+        The cache is looked up by the source text, so the whole function is scanned first.
         """
+        start = self.index
         rtype = self._parse_return_type()
-        _id = IdNode(self._expect(Token_Identifier))
-        self._expect(Token_LPAREN)
+        _id = IdNode(self._expect(Kind.ID), self.location)
+        self._expect(Kind.LPAREN)
 
         params = FuncDefParamList(None)
-        if not self._match(Token_RPAREN):
+        if not self._match(Kind.RPAREN):
             self._unget()
             params = self._parse_func_def_param_list()
-            self._expect(Token_RPAREN)
-        self._expect(Token_LBRACE)
+            self._expect(Kind.RPAREN)
+        self._expect(Kind.LBRACE)
+
+        source = None
+        if self.functions is not None:
+            body = self.index
+            source = self._skip_block(start)
+            function = self.functions.find(source, self.stable) if source is not None else None
+            if function is not None:
+                return function.reuse(rtype, _id, params)
+            self.index = body
+
         stmts = self._parse_inner_stmts()
 
         # function must return
         if stmts.childCount() == 0 or \
                 (True not in [isinstance(stmt, ReturnStmtNode) for stmt in stmts.childItems]):
-            self._parse_stmt_return()
+            try:
+                self._parse_stmt_return()
+            except InvalidTokenError:
+                if self.errors is None:
+                    raise
+                self.index = self.aheadIndex  # keep the function, whose `}` is the invalid token
 
-        self._expect(Token_RBRACE)
-        return FuncDefStmtNode(rtype, _id, params, stmts)
+        self._expect(Kind.RBRACE)
+        node = FuncDefStmtNode(rtype, _id, params, stmts)
+        node.source = source
+        return node
+
+    def _skip_block(self, start):
+        """
+        Step over the rest of the block just entered, to the `}` which closes it.
+        :param start: index of the token where the source text begins
+        :return: the source text from the token at `start` to the `}`. None if the block is not closed
+        """
+        depth = 1
+        while depth > 0:
+            kind = self._advance()
+            if kind is None:
+                return None
+            elif kind == Kind.LBRACE:
+                depth += 1
+            elif kind == Kind.RBRACE:
+                depth -= 1
+        buffer = self.buffer
+        return self.lexer.source[buffer.starts[start]:buffer.starts[self.aheadIndex] + buffer.lengths[self.aheadIndex]]
 
     def _parse_stmt_return(self):
         """
         returnStmt      ::= <RETURN> (expression)? <SEMICOLON>
         """
-        returnNode = self._expect(Token_RETURN)
-        if self._match(Token_SEMICOLON):
-            return ReturnStmtNode(returnNode)
+        self._expect(Kind.RETURN)
+        location = self.location
+        if self._match(Kind.SEMICOLON):
+            return ReturnStmtNode(location)
         else:
             self._unget()
             expr = self._parse_expr()
-        self._expect(Token_SEMICOLON)
-        return ReturnStmtNode(returnNode, expr)
+        self._expect(Kind.SEMICOLON)
+        return ReturnStmtNode(location, expr)
 
     def _parse_stmt_func_call(self):
         """
         funcCallStmt    ::= funcCallExpr <SEMICOLON>
         """
         funcCall = self._parse_func_call_expr()
-        self._expect(Token_SEMICOLON)
+        self._expect(Kind.SEMICOLON)
         return FuncCallStmtNode(funcCall)
 
     def _parse_func_call_expr(self):
         """
         funcCallExpr    ::= <ID> <LPAREN> ( funcCallParamList )?  <RPAREN>
         """
-        _id = self._expect(Token_Identifier)
-        self._expect(Token_LPAREN)
+        _id = IdNode(self._expect(Kind.ID), self.location)
+        self._expect(Kind.LPAREN)
 
         params = None
-        if not self._match(Token_RPAREN):
+        if not self._match(Kind.RPAREN):
             self._unget()
             params = self._parse_func_call_param_list()
-            self._expect(Token_RPAREN)
-        return FuncCallExprNode(IdNode(_id), params)
+            self._expect(Kind.RPAREN)
+        return FuncCallExprNode(_id, params)
 
     def _parse_func_def_param(self):
         """
         funcDefParam   ::=  dataType <ID>
         """
         data_type = self._parse_data_type()
-        _id = self._expect(Token_Identifier)
-        return FuncDefParam(data_type, IdNode(_id))
+        _id = self._expect(Kind.ID)
+        return FuncDefParam(data_type, IdNode(_id, self.location))
 
     def _parse_func_def_param_list(self):
         """
         funcDefParamList  ::= ( funcDefParam ( <COMMA> funcDefParam )* | <VOID> )
         """
-        if self._match(Token_VOID):
+        if self._match(Kind.VOID):
             return FuncDefParamList(None)
 
         self._unget()
         params = [self._parse_func_def_param()]
         while True:
-            if self._match(Token_COMMA):
+            if self._match(Kind.COMMA):
                 params.append(self._parse_func_def_param())
             else:
                 self._unget()
@@ -397,13 +749,13 @@ class Parser(object):
         """
         funcCallParamList  ::= ( expr   ( <COMMA> expr  )* | <VOID> )
         """
-        if self._match(Token_VOID):
+        if self._match(Kind.VOID):
             return FuncCallParamList(None)
 
         self._unget()
         params = [self._parse_expr()]
         while True:
-            if self._match(Token_COMMA):
+            if self._match(Kind.COMMA):
                 params.append(self._parse_expr())
             else:
                 self._unget()
@@ -414,8 +766,8 @@ class Parser(object):
         """
         returnType ::= <VOID>  | dataType
         """
-        _type = self._expect([Token_INT, Token_REAL, Token_VOID])
-        if _type == Token_VOID:
+        _type = self._expect_any(KINDS_RETURN_TYPE)
+        if _type.type == Kind.VOID:
             return ReturnTypeNode(None)
         else:
             self._unget()
@@ -429,36 +781,35 @@ class Parser(object):
         id_list = []
         data_type = self._parse_data_type()
         arr = self._match_arr(int_index=True)
-        _id = self._expect(Token_Identifier)
-        id_list.append(IdNode(_id))
+        _id = self._expect(Kind.ID)
+        id_list.append(IdNode(_id, self.location))
         while True:
-            if self._match(Token_COMMA):
-                _id = self._expect(Token_Identifier)
-                id_list.append((IdNode(_id)))
+            if self._match(Kind.COMMA):
+                _id = self._expect(Kind.ID)
+                id_list.append((IdNode(_id, self.location)))
             else:
                 self._unget()
                 break
 
-        if self._match(Token_ASSIGN):  # handle assign
-            if self._match(Token_LBRACE):  # array init
+        if self._match(Kind.ASSIGN):  # handle assign
+            if self._match(Kind.LBRACE):  # array init
                 self._unget()
                 if not arr:  # raise an error
-                    self._expect([Token_IntLiteral, Token_RealLiteral,
-                                  Token_Identifier, Token_LPAREN])
+                    self._expect_any(KINDS_DECLARE_EXPR)
 
                 arrInit = self._parse_arr_init(data_type.token, arr.size)
-                self._expect(Token_SEMICOLON)
+                self._expect(Kind.SEMICOLON)
                 return DeclareStmtNode(data_type, id_list, arr=arr, expr_or_init=arrInit)
             else:  # expression
                 self._unget()
                 if arr:
-                    self._expect(Token_LBRACE)  # raise an error
+                    self._expect(Kind.LBRACE)  # raise an error
                 expr = self._parse_expr()
-                self._expect(Token_SEMICOLON)
+                self._expect(Kind.SEMICOLON)
                 return DeclareStmtNode(data_type, id_list, expr_or_init=expr)
         else:
             self._unget()
-            self._expect(Token_SEMICOLON)
+            self._expect(Kind.SEMICOLON)
             return DeclareStmtNode(data_type, id_list, arr=arr)
 
     def _parse_arr_init(self, data_type, size):
@@ -466,90 +817,122 @@ class Parser(object):
         arrayInit   ::= <LBRACE>( INT_LITERAL (<COMMA> INT_LITERAL)* | REAL_LITERAL(<COMMA> REAL_LITERAL)* ) <RBRACE>
         :return:
         """
-        self._expect(Token_LBRACE)
-        self._expect([Token_IntLiteral, Token_RealLiteral])
+        self._expect(Kind.LBRACE)
+        self._expect_any(KINDS_LITERAL)
         liter = self.ahead
+        location = self.location
 
-        _type = Token_INT if isinstance(liter, IntLiteral) else Token_REAL
+        _type = Token_INT if liter.type == Kind.INT_LITERAL else Token_REAL
 
         if _type != data_type:  # raise an error
             self._unget()
-            if _type == Token_INT:
-                self._expect(Token_RealLiteral)
+            if _type.type == Kind.INT:
+                self._expect(Kind.REAL_LITERAL)
             else:
-                self._expect(Token_IntLiteral)
+                self._expect(Kind.INT_LITERAL)
 
-        literals = [LiteralNode(liter)]
+        literals = [LiteralNode(liter, location)]
         while True:
             if len(literals) == size:
                 break
-            m = self._match(Token_COMMA)
+            m = self._match(Kind.COMMA)
             if m:
-                li = self._expect(Token_IntLiteral if liter == Token_IntLiteral else Token_RealLiteral)
+                li = self._expect(liter.type)
             else:
                 self._unget()
                 break
-            literals.append(LiteralNode(li))
-        self._expect(Token_RBRACE)
+            literals.append(LiteralNode(li, self.location))
+        self._expect(Kind.RBRACE)
         return ArrayInitNode(literals)
 
     def _parse_inner_stmts(self):
         """
         innerStmts   ::= ( ifStmt | whileStmt | declareStmt | assignStmt | funcCallStmt | returnStmt )*
+
+        Blocks of `if` and `while` nest without recursion. Their parse functions are generators
+        which yield for each block, and are left in `blocks` while the block is parsed here,
+        then resumed with it when it ends. So nesting takes no Python stack.
         """
+        blocks = []  # (the statement whose block is being parsed, stmts of the block the statement is in)
         stmts = []
-        while self._get():
-            t = self.ahead
-            if t == Token_IF:
-                self._unget()
-                stmts.append(self._parse_stmt_if())
-            elif t == Token_WHILE:
-                self._unget()
-                stmts.append(self._parse_stmt_while())
-            elif t in [Token_INT, Token_REAL]:
-                self._unget()
-                stmts.append(self._parse_stmt_declare())
-            elif t == Token_RETURN:
-                self._unget()
-                stmts.append(self._parse_stmt_return())
-            elif isinstance(t, Identifier):
-                m = self._match(Token_LPAREN)
-                self._unget()
-                self._unget(t)
-                if m:
-                    stmts.append(self._parse_stmt_func_call())
+        while True:
+            kind = self._peek()
+            parse = _INNER_STMTS.get(kind)
+            if parse is None and kind is not None and kind != Kind.RBRACE and self.errors is not None:
+                # when recovering, a token which does not end the block is an error in it, and the block goes on.
+                # It is reported as without recovery, where the body of a function must return before its `}`
+                if blocks or any(isinstance(stmt, ReturnStmtNode) for stmt in stmts):
+                    parse = Parser._parse_stray_token
                 else:
-                    stmts.append(self._parse_stmt_assign())
-            else:
-                self._unget()
-                break
-        return InnerStmtsNode(stmts)
+                    parse = Parser._parse_stmt_return
+            if parse is None and not blocks:
+                return InnerStmtsNode(stmts)
+            start = self.index
+            try:
+                if parse is None:  # end of the innermost block
+                    stmt, block = blocks[-1][0], InnerStmtsNode(stmts)
+                    stmts = blocks.pop()[1]
+                else:
+                    stmt, block = parse(self), None
+                if isinstance(stmt, GeneratorType):
+                    try:
+                        stmt.send(block)
+                    except StopIteration as done:
+                        stmt = done.value
+                    else:  # a block of the statement begins
+                        blocks.append((stmt, stmts))
+                        stmts = []
+                        continue
+                stmts.append(stmt)
+            except InvalidTokenError:
+                if self.errors is None:
+                    raise
+                self._synchronize(start)
+
+    def _parse_stray_token(self):
+        """
+        Report a token which neither begins an innerStmt nor ends the block, as the `}` expected
+        """
+        self._expect(Kind.RBRACE)
+
+    def _parse_stmt_id(self):
+        """
+        Judge which stmt to parse by looking ahead.
+            assignStmt  ::= <ID> (array)? <ASSIGN> expression <SEMICOLON>
+            VS
+            funcCallStmt    ::= funcCallExpr <SEMICOLON>
+        """
+        if self._peek(2) == Kind.LPAREN:
+            return self._parse_stmt_func_call()
+        return self._parse_stmt_assign()
 
     def _parse_data_type(self):
         """
         dataType    ::= ( <INT> | <REAL> )
         """
-        _type = self._expect([Token_INT, Token_REAL])
-        return DataTypeNode(_type)
+        _type = self._expect_any(KINDS_DATA_TYPE)
+        return DataTypeNode(_type, self.location)
 
     def _parse_stmt_if(self):
         """
         ifStmt  ::= <IF> <LPAREN> condition <RPAREN> <LBRACE> innerStmts <RBRACE>
                     ( <ELSE> <LBRACE> innerStmts  <RBRACE> )?
+
+        A generator, which yields before each innerStmts and is sent it, see `_parse_inner_stmts`.
         :return:
         """
-        self._expect(Token_IF)
-        self._expect(Token_LPAREN)
+        self._expect(Kind.IF)
+        self._expect(Kind.LPAREN)
         cond = self._parse_cond()
-        self._expect(Token_RPAREN)
-        self._expect(Token_LBRACE)
-        stmts = self._parse_inner_stmts()
+        self._expect(Kind.RPAREN)
+        self._expect(Kind.LBRACE)
+        stmts = yield
         stmts2 = None
-        self._expect(Token_RBRACE)
-        if self._match(Token_ELSE):
-            self._expect(Token_LBRACE)
-            stmts2 = self._parse_inner_stmts()
-            self._expect(Token_RBRACE)
+        self._expect(Kind.RBRACE)
+        if self._match(Kind.ELSE):
+            self._expect(Kind.LBRACE)
+            stmts2 = yield
+            self._expect(Kind.RBRACE)
         else:
             self._unget()
         return IfStmtNode(cond, stmts, stmts2)
@@ -557,28 +940,30 @@ class Parser(object):
     def _parse_stmt_while(self):
         """
         whileStmt   ::= <WHILE> <LPAREN> condition <RPAREN> <LBRACE> innerStmts <RBRACE>
+
+        A generator like `_parse_stmt_if`.
         :return:
         """
-        self._expect(Token_WHILE)
-        self._expect(Token_LPAREN)
+        self._expect(Kind.WHILE)
+        self._expect(Kind.LPAREN)
         cond = self._parse_cond()
-        self._expect(Token_RPAREN)
-        self._expect(Token_LBRACE)
-        stmts = self._parse_inner_stmts()
-        self._expect(Token_RBRACE)
+        self._expect(Kind.RPAREN)
+        self._expect(Kind.LBRACE)
+        stmts = yield
+        self._expect(Kind.RBRACE)
         return WhileStmtNode(cond, stmts)
 
     def _parse_stmt_assign(self):
         """
         assignStmt  ::= <ID> (array)? <ASSIGN> expression <SEMICOLON>
         """
-        self._expect(Token_Identifier)
-        t = self.ahead
+        self._expect(Kind.ID)
+        _id = IdNode(self.ahead, self.location)
         arr = self._match_arr()
-        self._expect(Token_ASSIGN)
+        self._expect(Kind.ASSIGN)
         expr = self._parse_expr()
-        self._expect(Token_SEMICOLON)
-        return AssignStmtNode(IdNode(t), expr, arr=arr)
+        self._expect(Kind.SEMICOLON)
+        return AssignStmtNode(_id, expr, arr=arr)
 
     def _parse_cond(self):
         """
@@ -593,67 +978,76 @@ class Parser(object):
     def _parse_expr(self):
         """
         expression  ::=	term (addOp term)*
-        :return:
-        """
-        term = self._parse_term()
-        l = []
-        while True:
-            add = self._match_op_add()
-            if add:
-                t = self._parse_term()
-            else:
-                self._unget()
-                break
-            l.append((add, t))
-        return ExprNode(term, l)
-
-    def _parse_term(self):
-        """
-        term    ::=	factor (mulOp factor)*
-        :return:
-        """
-        l = []
-        factor = self._parse_factor()
+        term        ::=	factor (mulOp factor)*
+        factor	    ::= <REAL_LITERAL> | <INT_LITERAL> | <ID> ( array )?
+                        | funcCallExpr | <LPAREN> expression <RPAREN>
+
+        Parsed by precedence climbing on explicit stacks, so that nesting takes no Python stack:
+        an operator waits in `ops` until one which binds no tighter comes, and a parenthesis or
+        the params of a call leave the expression around them in `groups` until they are closed.
+        :return: an expression node
+        """
+        groups = []  # (id of the call or None for a parenthesis, params parsed, operands, ops) of each open group
+        operands = []  # left operands of the operators in ops
+        ops = []  # (binding power, lexeme) of the operators waiting for their right operands
         while True:
-            m = self._match_op_mul()
-            if m:
-                f = self._parse_factor()
-            else:
-                self._unget()
-                break
-            l.append((m, f))
-        return TermNode(factor, l)
-
-    def _parse_factor(self):
-        """
-        factor	::= <REAL_LITERAL> | <INT_LITERAL> | <ID> ( array )?
-                    | funcCallExpr | <LPAREN> expression <RPAREN>
-        """
-        self._expect((Token_RealLiteral, Token_IntLiteral, Token_Identifier, Token_LPAREN))
-        t = self.ahead
-        if self.ahead == Token_LPAREN:
-            expr = self._parse_expr()
-            self._expect(Token_RPAREN)
-            return FactorNode(expr=expr)
-        elif self.ahead == Token_Identifier:
-            m = self._match(Token_LPAREN)
-            self._unget()
-            if m:
-                self._unget(t)
-                funcCall = self._parse_func_call_expr()
-                return FactorNode(funcCall=funcCall)
+            t = self._expect_any(KINDS_FACTOR)
+            location = self.location
+            kind = self.kind
+            if kind == Kind.LPAREN:
+                groups.append((None, None, operands, ops))
+                operands, ops = [], []
+                continue
+            elif kind == Kind.ID and self._peek() == Kind.LPAREN:  # funcCallExpr
+                _id = IdNode(t, location)
+                self._expect(Kind.LPAREN)
+                if self._match(Kind.RPAREN):
+                    operand = FuncCallExprNode(_id, None)
+                else:
+                    self._unget()
+                    if not self._match(Kind.VOID):  # params to parse
+                        self._unget()
+                        groups.append((_id, [], operands, ops))
+                        operands, ops = [], []
+                        continue
+                    self._expect(Kind.RPAREN)
+                    operand = FuncCallExprNode(_id, FuncCallParamList(None))
+            elif kind == Kind.ID:
+                operand = VarNode(t, location, self._match_arr())
             else:
-                arr = self._match_arr()
-                return FactorNode(_id=IdNode(t), arr=arr)
-        else:
-            return FactorNode(literal=LiteralNode(t))
+                operand = LiteralExprNode(t, location)
+
+            while True:  # the operator after the operand, or the end of the innermost group
+                power = _BINDING_POWER.get(self._peek(), 0)
+                while ops and ops[-1][0] >= power:
+                    operand = BinOpNode(ops.pop()[1], operands.pop(), operand)
+                if power:
+                    self._advance()
+                    ops.append((power, self.ahead.lexeme))
+                    operands.append(operand)
+                    break
+                if not groups:
+                    return operand
+
+                _id, params, operands, ops = groups.pop()
+                if _id is None:
+                    self._expect(Kind.RPAREN)
+                else:
+                    params.append(operand)
+                    if self._match(Kind.COMMA):
+                        groups.append((_id, params, operands, ops))
+                        operands, ops = [], []
+                        break
+                    self._unget()
+                    self._expect(Kind.RPAREN)
+                    operand = FuncCallExprNode(_id, FuncCallParamList(params))
 
     def _parse_op_comp(self):
         """
         compOp      ::=	<LT> | <GT> | <EQUAL> | <NEQUAL>
         """
-        self._expect((Token_LT, Token_GT, Token_EQUAL, Token_NEQUAL))
-        return CompNode(LeafNode(self.ahead))
+        self._expect_any(KINDS_COMP_OP)
+        return CompNode(LeafNode(self.ahead, self.location))
 
     def _match_arr(self, int_index=False):
         """
@@ -667,49 +1061,87 @@ class Parser(object):
         :param int_index: index must be int literal? default is false
         """
 
-        m = self._match(Token_LBRACKET)
+        m = self._match(Kind.LBRACKET)
         if not m:
             self._unget()
             return None
 
-        if self._match(Token_RBRACKET):
+        if self._match(Kind.RBRACKET):
             return ArrayNode()
         else:
             self._unget()
-            index = self._expect([Token_IntLiteral, Token_Identifier])
-            self._expect(Token_RBRACKET)
-            if isinstance(index, Identifier):
+            index = self._expect_any(KINDS_ARRAY_INDEX)
+            location = self.location
+            self._expect(Kind.RBRACKET)
+            if index.type == Kind.ID:
                 if int_index:
-                    self._unget()
-                    self._unget(index)
-                    self._expect(Token_IntLiteral)  # this code will raise an error
-                return ArrayNode(_id=IdNode(index))
+                    self._unget()  # the `]`
+                    self._unget()  # the index
+                    self._expect(Kind.INT_LITERAL)  # this code will raise an error
+                return ArrayNode(_id=IdNode(index, location))
             else:
-                return ArrayNode(literal=LiteralNode(index))
+                return ArrayNode(literal=LiteralNode(index, location))
 
-    def _match_op_add(self):
-        """
-        addOp	    ::=	<PLUS> | <MINUS>
-        """
-        if self._match((Token_PLUS, Token_MINUS)):
-            return AddNode(LeafNode(self.ahead))
 
-    def _match_op_mul(self):
-        """
-        mulOp	    ::=	<TIMES> | <DIVIDE>
-        """
-        if self._match((Token_TIMES, Token_DIVIDE)):
-            return MulNode(LeafNode(self.ahead))
+_FIRST = first_sets()
 
+# the parse function of each statement, by the kind of its first token
+_EXTER_STMTS = dispatch(_FIRST, [
+    ('declareStmt', Parser._parse_exter_stmt),
+    ('funcDefStmt', Parser._parse_exter_stmt),
+])
+_INNER_STMTS = dispatch(_FIRST, [
+    ('ifStmt', Parser._parse_stmt_if),
+    ('whileStmt', Parser._parse_stmt_while),
+    ('declareStmt', Parser._parse_stmt_declare),
+    ('assignStmt', Parser._parse_stmt_id),
+    ('funcCallStmt', Parser._parse_stmt_id),
+    ('returnStmt', Parser._parse_stmt_return),
+])
 
 if __name__ == '__main__':
-    if len(sys.argv) > 2:
+    args = sys.argv[1:]
+    mapped = '--mmap' in args  # memory-map the source file
+    if mapped:
+        args.remove('--mmap')
+    recover = '--recover' in args  # only run parser, and report all invalid tokens and syntax errors of each file
+    if recover:
+        args.remove('--recover')
+    cache = None  # --cache=DIR, keep token streams in DIR
+    for arg in list(args):
+        if arg.startswith('--cache='):
+            cache = TokenCache(arg[len('--cache='):])
+            args.remove(arg)
+    trees = None  # --trees=DIR, keep syntax trees in DIR
+    for arg in list(args):
+        if arg.startswith('--trees='):
+            trees = TreeCache(arg[len('--trees='):])
+            args.remove(arg)
+    workers = None  # --jobs=N, lex the source in N processes
+    for arg in list(args):
+        if arg.startswith('--jobs='):
+            workers = int(arg[len('--jobs='):])
+            args.remove(arg)
+
+    if len(args) > 1 and not recover:
         print('too many args')
         sys.exit(0)
 
-    if len(sys.argv) == 1:
+    if recover:
+        valid = True
+        for path in args or [None]:
+            stdin = _read_keyboard() if path is None else _read_file(path, mapped=mapped)
+            errors = StringIO()
+            p = Parser(stdin, stderr=errors, cache=cache, workers=workers, trees=trees)
+            p.parse(recover=True)
+            if p.errors:
+                valid = False
+                sys.stderr.write('%s:%s\n' % (path or '<stdin>', errors.getvalue()))
+        sys.exit(0 if valid else 1)
+
+    if len(args) == 0:
         stdin = _read_keyboard()
     else:
-        stdin = _read_file(sys.argv[1])
-    p = Parser(stdin)
+        stdin = _read_file(args[0], mapped=mapped)
+    p = Parser(stdin, cache=cache, workers=workers, trees=trees)
     p.parse()
@@ -1,6 +1,7 @@
 """
 Symbol table.
 """
+from bisect import bisect_right
 from io import StringIO
 import cinter.tokens as tokens
 
@@ -91,7 +92,7 @@ class Symbol(object):
     """
 
     def __init__(self, name, stype):
-        assert isinstance(name, str)
+        assert isinstance(name, tokens.Name)
         assert isinstance(stype, SType)
 
         self.name = name
@@ -109,6 +110,7 @@ class STable(object):
         self.parent = None  # parent table
         self.children = []  # children tables
         self.symbols = []  # symbols in the table
+        self.symbol_index = {}  # name -> indexes of the symbols with the name in `symbols`, in ascending order
         self.tsindex = -1  # The Symbol index in parent after which the table was appended
         self.children_tsindex = []  # tsindex of children
 
@@ -167,9 +169,17 @@ class STable(object):
         """
         if check and self._symbol_has_defined(symbol):
             raise RedefinedError()
+        self.symbol_index.setdefault(symbol.name, []).append(len(self.symbols))
         self.symbols.append(symbol)
         symbol.table = self
 
+    def symbol_find(self, name):
+        """
+        find the symbol with name of `name`, which is visible in the table
+        :return: the symbol or None
+        """
+        return self._symbol_find(name)
+
     def symbol_at(self, index):
         try:
             symbol = self.symbols[index]
@@ -228,7 +238,7 @@ class STable(object):
             raise ParamMismatchError()
 
         # do not check write(var) type,'cause the param can be int or real
-        if symbol.name in 'write':
+        if symbol.name == tokens.NAME_WRITE:
             return
 
         # matching call param types with defined param types
@@ -285,7 +295,7 @@ class STable(object):
         return value
 
     def check_main(self):
-        main = self._symbol_find('main')
+        main = self._symbol_find(tokens.NAME_MAIN)
         if not main or not isinstance(main.stype, STypeFunc):
             return "No main function found"
         elif main.stype.type != tokens.Token_VOID:
@@ -304,15 +314,13 @@ class STable(object):
         if not ends:
             ends = len(self.symbols) - 1
 
-        for i in range(ends, -1, -1):  # check self
-            smb = self.symbol_at(i)
-            if smb.name == name:
-                return smb
-        else:  # check parent tables
-            if self.parent:
-                return self.parent._symbol_find(name, self.tsindex)
-            else:  # recursion ends at root table whose parent is None
-                return None
+        indexes = self.symbol_index.get(name)
+        if indexes and indexes[0] <= ends:  # check self, the last one in [0,ends]
+            return self.symbols[indexes[bisect_right(indexes, ends) - 1]]
+        elif self.parent:  # check parent tables
+            return self.parent._symbol_find(name, self.tsindex)
+        else:  # recursion ends at root table whose parent is None
+            return None
 
     def _symbol_find_func(self, ends=None):
         """
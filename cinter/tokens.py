@@ -21,10 +21,62 @@ Here is all the tokens:
         REAL_LITERAL::= <INT_LITERAL> ( "."(INT_LITERAL)+ )?
 """
 
+from array import array
+from enum import IntEnum
+
 __author__ = 'YieldNull'
 
 
+class Name(int):
+    """
+    An interned name: an identifier of the source or a name generated for the IR.
+
+    It compares and hashes as its integer id, and prints as its text.
+    """
+    __slots__ = ()
+
+    def __str__(self):
+        return _names[self]
+
+    __repr__ = __str__
+
+
+_names = []  # text of each name, indexed by name id
+_name_index = {}  # text -> Name
+
+
+def intern_name(text):
+    """
+    Get the Name of `text`, giving it the next id when it is seen for the first time.
+
+    The table is kept for the whole process and never shrinks, on purpose: the codes and symbols
+    that `cinter.incremental.FunctionCache` keeps across compilations refer to names by id,
+    so ids must not be given again to other texts. It grows with the distinct names seen,
+    the identifiers of the sources and the temp variables `_t<n>` of the longest IR,
+    which is small in a run of the command line and bounded by the sources edited in the editor.
+    """
+    name = _name_index.get(text)
+    if name is None:
+        name = _name_index[text] = Name(len(_names))
+        _names.append(text)
+    return name
+
+
+NAME_MAIN = intern_name('main')
+NAME_READ = intern_name('read')
+NAME_WRITE = intern_name('write')
+
+
 class Token(object):
+    """
+    A token of the source.
+
+    A token does not know where it is. Reserved words and punctuation are shared flyweights,
+    such as `Token_SEMICOLON`, and the location of each token read is kept beside it,
+    as the (token, location) pairs of `Lexer.iter_tokens` and the rows and columns of TokenBuffer.
+    """
+    __slots__ = ('lexeme', 'type', 'cate')
+
     def __init__(self, lexeme, cate):
         """
         :param lexeme: the lexeme of the token
@@ -32,51 +84,46 @@ class Token(object):
         :return:
         """
         self.lexeme = lexeme
-        self.type = TYPE[cate]
+        self.type = Kind[cate]
         self.cate = cate  # the category of the token.like 'COMMA' corresponds to ','
-        self.row = None
-        self.column = None
 
     def __str__(self):
         return "<%s: '%s'>" % (self.cate, self.lexeme)
 
     def __eq__(self, other):  # to enable token matching
-        if self.type == other.type:
-            return True
-        else:
-            return False
+        return self.type == other.type
 
     def __ne__(self, other):  # to enable token matching
-        if self.type != other.type:
-            return True
-        else:
-            return False
-
-    def set_location(self, location):
-        self.row, self.column = location
-
-    def get_location(self):
-        return self.row, self.column
+        return self.type != other.type
 
 
 class IntLiteral(Token):
+    __slots__ = ('value',)
+
     def __init__(self, value):
         super(IntLiteral, self).__init__(str(value), 'INT_LITERAL')
         self.value = value
 
 
 class RealLiteral(Token):
+    __slots__ = ('value',)
+
     def __init__(self, value):
         super(RealLiteral, self).__init__(str(value), 'REAL_LITERAL')
         self.value = value
 
 
 class Identifier(Token):
+    __slots__ = ('name',)
+
     def __init__(self, lexeme):
         super(Identifier, self).__init__(lexeme, 'ID')
+        self.name = intern_name(lexeme)
 
 
 class ReservedToken(Token):
+    __slots__ = ()
+
     def __init__(self, lexeme, cate):
         super(ReservedToken, self).__init__(lexeme, cate)
 
@@ -84,15 +131,56 @@ class ReservedToken(Token):
         return "<%s: '%s'>" % ('RESERVE', self.lexeme)
 
 
-TYPE = {
-    'IF': 255, 'ELSE': 256, 'WHILE': 257, 'READ': 258, 'WRITE': 259,
-    'INT': 260, 'REAL': 261, 'PLUS': 264,
-    'MINUS': 265, 'TIMES': 267, 'DIVIDE': 268, 'ASSIGN': 269, 'LT': 270,
-    'GT': 271, 'EQUAL': 272, 'NEQUAL': 273, 'LPAREN': 274, 'RPAREN': 275,
-    'LBRACE': 276, 'RBRACE': 277, 'LBRACKET': 278, 'RBRACKET': 279,
-    'COMMA': 283, 'SEMICOLON': 284, 'ID': 287,
-    'INT_LITERAL': 288, 'REAL_LITERAL': 289, 'RETURN': 290, 'VOID': 291
-}
+class Kind(IntEnum):
+    """
+    The kind of a token, named by its category. A kind is an int, so that it is compared
+    and hashed as an int and kept in the `types` column of TokenBuffer.
+    """
+    IF = 255
+    ELSE = 256
+    WHILE = 257
+    READ = 258
+    WRITE = 259
+    INT = 260
+    REAL = 261
+    PLUS = 264
+    MINUS = 265
+    TIMES = 267
+    DIVIDE = 268
+    ASSIGN = 269
+    LT = 270
+    GT = 271
+    EQUAL = 272
+    NEQUAL = 273
+    LPAREN = 274
+    RPAREN = 275
+    LBRACE = 276
+    RBRACE = 277
+    LBRACKET = 278
+    RBRACKET = 279
+    COMMA = 283
+    SEMICOLON = 284
+    ID = 287
+    INT_LITERAL = 288
+    REAL_LITERAL = 289
+    RETURN = 290
+    VOID = 291
+
+
+TYPE = dict((kind.name, kind) for kind in Kind)  # category -> kind
+
+
+class KindSet(frozenset):
+    """
+    A set of token kinds, such as those the parser expects at some point.
+    It also keeps the kinds in the order they are given, to prompt them in errors.
+    """
+
+    def __new__(cls, *kinds):
+        self = super(KindSet, cls).__new__(cls, kinds)
+        self.order = kinds
+        return self
+
 
 Token_IF = ReservedToken('if', 'IF')
 Token_ELSE = ReservedToken('else', 'ELSE')
@@ -137,3 +225,86 @@ TOKEN_NON_CONF = {
     '(': Token_LPAREN, ')': Token_RPAREN, '{': Token_LBRACE, '}': Token_RBRACE,
     '[': Token_LBRACKET, ']': Token_RBRACKET, ',': Token_COMMA, ';': Token_SEMICOLON,
 }
+
+TOKEN_BY_TYPE = dict((t.type, t) for t in list(TOKEN_RESERVED.values()) + list(TOKEN_NON_CONF.values()) + [
+    Token_DIVIDE, Token_ASSIGN, Token_EQUAL, Token_LT, Token_NEQUAL])
+
+
+class TokenBuffer(object):
+    """
+    A compact store of the tokens read from a lexer.
+
+    Instead of one Token object per token, each field is kept in a column of an `array`,
+    and token i is the i-th item of every column. Lexemes are interned in `lexemes`,
+    and `lexeme_ids` holds the index of each token's lexeme in it.
+
+    `row` and `column` are the location that the lexer reports for the token,
+    `start` and `length` its span in the source.
+    """
+
+    def __init__(self):
+        self.types = array('H')
+        self.starts = array('I')
+        self.lengths = array('I')
+        self.rows = array('I')
+        self.columns = array('I')
+        self.lexeme_ids = array('I')
+        self.lexemes = []  # interned lexemes
+        self._lexeme_index = {}  # lexeme -> index in lexemes
+        self.ended = False  # the lexer has reached the end of file
+
+    def __len__(self):
+        return len(self.types)
+
+    def read(self, lexer):
+        """
+        Read the next token from lexer and append it.
+        :return: the token read, None if it is the end of file
+        """
+        token = lexer.next_token()
+        if token is None:
+            self.ended = True
+        else:
+            self.append(token, lexer.start, lexer.pos - lexer.start, lexer.get_location())
+        return token
+
+    def append(self, token, start, length, location):
+        lexeme_id = self._lexeme_index.get(token.lexeme)
+        if lexeme_id is None:
+            lexeme_id = self._lexeme_index[token.lexeme] = len(self.lexemes)
+            self.lexemes.append(token.lexeme)
+
+        self.types.append(token.type)
+        self.starts.append(start)
+        self.lengths.append(length)
+        self.rows.append(location[0])
+        self.columns.append(location[1])
+        self.lexeme_ids.append(lexeme_id)
+
+    def discard(self, count):
+        """
+        Drop the first `count` tokens, once they are no longer needed.
+        The tokens after them are moved to the front, and their indexes decrease by `count`.
+        """
+        for column in (self.types, self.starts, self.lengths, self.rows, self.columns, self.lexeme_ids):
+            del column[:count]
+
+    def token(self, i):
+        """
+        Build the i-th token as a Token object. Reserved words and punctuation are the shared ones,
+        the location is got by `get_location(i)`
+        """
+        _type = self.types[i]
+        shared = TOKEN_BY_TYPE.get(_type)
+        if shared is not None:
+            return shared
+        lexeme = self.lexemes[self.lexeme_ids[i]]
+        if _type == Kind.ID:
+            return Identifier(lexeme)
+        elif _type == Kind.INT_LITERAL:
+            return IntLiteral(int(lexeme))
+        else:
+            return RealLiteral(float(lexeme))
+
+    def get_location(self, i):
+        return self.rows[i], self.columns[i]
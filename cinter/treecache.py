@@ -0,0 +1,216 @@
+"""
+An on-disk cache of syntax trees.
+
+The syntax tree of a source is stored in a file named by the hash of the source, its kind,
+`Parser.version` and `Lexer.version`, so a source that is parsed again loads its tree instead.
+The columns of a source memory-mapped as bytes count bytes, so its tree is kept apart from that of a str.
+
+A tree is kept as the calls of node constructors that build it, children before parents,
+so that loading it runs the constructors as the parser would, without lexing or parsing:
+    entries - (class code, arguments...) of each node
+    lexemes - (kind, lexeme) of each token in the tree, the tokens in entries are indexes of it
+An argument is encoded by the kind given for it in `_CLASSES`:
+    n   a node, as the index of its entry
+    o   a node or None, as the index or -1
+    N   a list of nodes or None, as a tuple of indexes or None
+    t   a token, as the index in lexemes
+    l   a location, as row and column
+    s   a str
+
+create on '10/18/26 1:05 AM'
+"""
+import gc
+import marshal
+from contextlib import contextmanager
+
+from cinter.cache import DiskCache
+from cinter.lexer import Lexer
+from cinter.nodes import *
+from cinter.tokens import Kind, TOKEN_BY_TYPE, Identifier, IntLiteral, RealLiteral
+
+__author__ = 'YieldNull'
+
+
+def _declare_arr(node):
+    arr = node.childAt(1)
+    return arr if isinstance(arr, ArrayNode) else None
+
+
+def _array_index(node, cls):
+    index = node.childAt(0)
+    return index if isinstance(index, cls) else None
+
+
+# (class, kinds of the arguments of its constructor, the arguments of a node)
+_CLASSES = [
+    (ExterStmtsNode, 'N', lambda n: (n.childItems,)),
+    (FuncDefStmtNode, 'nnnn', lambda n: (n.childAt(0), n.id, n.childAt(2), n.childAt(3))),
+    (ReturnTypeNode, 'o', lambda n: (n.data_type,)),
+    (FuncDefParam, 'nn', lambda n: (n.childAt(0), n.childAt(1))),
+    (FuncDefParamList, 'N', lambda n: (n.params,)),
+    (FuncCallExprNode, 'no', lambda n: (n.id, n.params)),
+    (FuncCallStmtNode, 'n', lambda n: (n.funcCall,)),
+    (FuncCallParamList, 'N', lambda n: (n.childItems or None,)),
+    (ReturnStmtNode, 'lo', lambda n: (n.location, n.childAt(0))),
+    (DeclareStmtNode, 'nNoo', lambda n: (n.childAt(0), n.id_list, _declare_arr(n), n.assign)),
+    (ArrayInitNode, 'N', lambda n: (n.literals,)),
+    (InnerStmtsNode, 'N', lambda n: (n.childItems,)),
+    (IfStmtNode, 'nno', lambda n: (n.childAt(0), n.childAt(1), n.childAt(2))),
+    (WhileStmtNode, 'nn', lambda n: (n.childAt(0), n.childAt(1))),
+    (AssignStmtNode, 'nno', lambda n: (n.id, n.expr, n.arr)),
+    (ConditionNode, 'nnn', lambda n: (n.childAt(0), n.childAt(1), n.childAt(2))),
+    (CompNode, 'n', lambda n: (n.childAt(0),)),
+    (BinOpNode, 'snn', lambda n: (n.op, n.childAt(0), n.childAt(1))),
+    (ArrayNode, 'oo', lambda n: (_array_index(n, IdNode), _array_index(n, LiteralNode))),
+    (LeafNode, 'tl', lambda n: (n.token, n.location)),
+    (LiteralNode, 'tl', lambda n: (n.token, n.location)),
+    (LiteralExprNode, 'tl', lambda n: (n.token, n.location)),
+    (DataTypeNode, 'tl', lambda n: (n.token, n.location)),
+    (IdNode, 'tl', lambda n: (n.token, n.location)),
+    (VarNode, 'tlo', lambda n: (n.token, n.location, n.arr)),
+]
+_CODES = dict((cls, code) for code, (cls, kinds, args) in enumerate(_CLASSES))
+
+# what loading a damaged file raises: marshal on a truncated file or a length out of range,
+# `load_tree` on indexes out of range, and the constructors on arguments of the wrong kind
+_BROKEN = (EOFError, ValueError, TypeError, IndexError, KeyError, AttributeError, AssertionError, MemoryError)
+
+
+@contextmanager
+def _gc_paused():
+    """
+    Pause the garbage collector while a tree is dumped or loaded,
+    or it would walk the young entries and nodes over and over as they are made,
+    which takes more time than making them.
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def dump_tree(root):
+    """
+    :return: (lexemes, entries) of the tree, see the module doc
+    """
+    # order the nodes so that the nodes in the arguments of each one come before it
+    order = []
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        order.append(node)
+        cls, kinds, args = _CLASSES[_CODES[type(node)]]
+        for arg in args(node):
+            if isinstance(arg, Node):
+                stack.append(arg)
+            elif isinstance(arg, list):
+                stack += arg
+    order.reverse()
+
+    index = {}  # id of node -> index of its entry
+    lexemes = []
+    lexeme_index = {}  # (kind, lexeme) -> index in lexemes
+    entries = []
+    for node in order:
+        code = _CODES[type(node)]
+        cls, kinds, args = _CLASSES[code]
+        entry = [code]
+        for kind, arg in zip(kinds, args(node)):
+            if kind == 'n':
+                entry.append(index[id(arg)])
+            elif kind == 'o':
+                entry.append(-1 if arg is None else index[id(arg)])
+            elif kind == 'N':
+                entry.append(None if arg is None else tuple(index[id(item)] for item in arg))
+            elif kind == 't':
+                key = (int(arg.type), arg.lexeme)
+                if key not in lexeme_index:
+                    lexeme_index[key] = len(lexemes)
+                    lexemes.append(key)
+                entry.append(lexeme_index[key])
+            elif kind == 'l':
+                entry += arg
+            else:
+                entry.append(arg)
+        index[id(node)] = len(entries)
+        entries.append(tuple(entry))
+    return lexemes, entries
+
+
+def load_tree(lexemes, entries):
+    """
+    Build the tree dumped by `dump_tree` again
+    :return: the root node
+    """
+    tokens = []
+    for kind, lexeme in lexemes:
+        token = TOKEN_BY_TYPE.get(kind)
+        if token is None:
+            if kind == Kind.ID:
+                token = Identifier(lexeme)
+            elif kind == Kind.INT_LITERAL:
+                token = IntLiteral(int(lexeme))
+            else:
+                token = RealLiteral(float(lexeme))
+        tokens.append(token)
+
+    nodes = []
+    for entry in entries:
+        cls, kinds, args = _CLASSES[entry[0]]
+        values = []
+        i = 1
+        for kind in kinds:
+            value = entry[i]
+            i += 1
+            if kind == 'n':
+                values.append(nodes[value])
+            elif kind == 'o':
+                values.append(None if value < 0 else nodes[value])
+            elif kind == 'N':
+                values.append(None if value is None else [nodes[j] for j in value])
+            elif kind == 't':
+                values.append(tokens[value])
+            elif kind == 'l':
+                values.append((value, entry[i]))
+                i += 1
+            else:
+                values.append(value)
+        nodes.append(cls(*values))
+    return nodes[-1]
+
+
+class TreeCache(DiskCache):
+    """
+    Syntax trees cached in a directory
+    """
+    suffix = '.tree'
+
+    def versions(self):
+        from cinter.parser import Parser
+
+        return Parser.version, Lexer.version
+
+    def load(self, source):
+        """
+        :return: the root node of the syntax tree of `source`, None if it is not cached
+        """
+        raw = self.read(source)
+        if raw is None:
+            return None
+        with _gc_paused():
+            try:
+                data = marshal.loads(raw)
+                return load_tree(data[0], data[1])
+            except _BROKEN:  # a damaged file is a miss
+                return None
+
+    def store(self, source, root):
+        """
+        Write the syntax tree of `source`
+        """
+        with _gc_paused():
+            data = marshal.dumps(dump_tree(root))
+        self.write(source, data)
@@ -0,0 +1,6 @@
+// This is a test for non ASCII chars in comments: комментарий
+/*
+ * привет, 世界
+ */
+int a=1;
+real b=01;
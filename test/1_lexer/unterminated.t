@@ -0,0 +1,6 @@
+// This is a test for an unterminated comment
+int a=1;   /* closed */
+real b;
+  b = 0.5; /* not closed
+ * int c;
+ *
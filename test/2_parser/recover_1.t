@@ -0,0 +1,7 @@
+//This is a test for stray closing braces at top level
+int a;
+} } }
+void main(){
+	a = 1;
+	return ;
+}
@@ -0,0 +1,20 @@
+//This is a test for errors inside blocks
+void main(){
+	int a;
+	;
+	while(a>1){
+		if(a>2){
+			a = ;
+			;
+			a = a-1;
+		}
+		a = a-;
+	}
+	int[3] b = {1,2,;
+	if(a>){
+		a = 1;
+	}else{
+		a = 2;
+	}
+	return ;
+}
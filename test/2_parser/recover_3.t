@@ -0,0 +1,6 @@
+//This is a test for the end of file inside blocks
+void main(){
+	int a;
+	if(a>1){
+		while(a>2){
+			a = a-1;
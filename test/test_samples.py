@@ -0,0 +1,76 @@
+"""
+Check the samples which have an expected output.
+
+A sample `name.t` in test/1_lexer or test/2_parser is checked when `name.out` is next to it,
+on every lexer engine:
+    1_lexer  - the tokens and invalid tokens printed by the lexer with recovery
+    2_parser - the errors printed by the parser with recovery, as `python -m cinter.parser --recover` does
+
+Run from the root of the repository:
+
+    python -m unittest test.test_samples
+
+create on '10/18/26 2:10 PM'
+"""
+import glob
+import os
+import unittest
+from io import StringIO
+
+from bench.suite import ENGINE_NAMES
+from cinter.parser import Parser
+
+__author__ = 'YieldNull'
+
+TEST = os.path.dirname(os.path.abspath(__file__))
+
+
+def samples(phase):
+    """
+    :return: list of (path of the sample, its expected output)
+    """
+    result = []
+    for path in sorted(glob.glob(os.path.join(TEST, phase, '*.out'))):
+        with open(path) as f:
+            result.append((path[:-len('.out')] + '.t', f.read()))
+    return result
+
+
+def lex(path, engine):
+    """
+    :return: what the lexer prints on the sample
+    """
+    out = StringIO()
+    p = Parser(open(path), stdout=out, stderr=out, mode=Parser.mode_lexer, engine=engine)
+    p.lexse(tree=False, recover=True)
+    return out.getvalue()
+
+
+def parse(path, engine):
+    """
+    :return: the errors the parser prints on the sample
+    """
+    errors = StringIO()
+    p = Parser(open(path), stdout=StringIO(), stderr=errors, mode=Parser.mode_parser, engine=engine)
+    p.parse(recover=True)
+    return errors.getvalue()
+
+
+class SampleTest(unittest.TestCase):
+    def check(self, phase, run):
+        cases = samples(phase)
+        self.assertTrue(cases)
+        for path, expected in cases:
+            for engine, name in sorted(ENGINE_NAMES.items()):
+                with self.subTest(sample=os.path.basename(path), engine=name):
+                    self.assertEqual(run(path, engine), expected)
+
+    def test_lexer(self):
+        self.check('1_lexer', lex)
+
+    def test_parser(self):
+        self.check('2_parser', parse)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+"""
+Check that a damaged file in the cache of syntax trees is parsed again.
+
+    python -m unittest test.test_treecache
+
+create on '10/18/26 2:40 PM'
+"""
+import marshal
+import os
+import shutil
+import tempfile
+import unittest
+from io import StringIO
+
+from cinter.parser import Parser
+from cinter.treecache import TreeCache
+
+__author__ = 'YieldNull'
+
+SAMPLE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '6_program', 'select_sort.t')
+
+
+class TreeCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.trees = TreeCache(self.directory)
+        with open(SAMPLE) as f:
+            self.source = f.read()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def parse(self, trees=None):
+        """
+        :return: the syntax tree of the sample, as printed
+        """
+        result = Parser(StringIO(self.source), stdout=StringIO(), stderr=StringIO(), trees=trees).parse()
+        return result[0].gen_tree()
+
+    def check_damaged(self, data):
+        self.trees.write(self.source, data)
+        self.assertIsNone(self.trees.load(self.source))
+        self.assertEqual(self.parse(self.trees), self.parse())
+        self.assertIsNotNone(self.trees.load(self.source))  # stored again by the parse
+
+    def test_junk(self):
+        self.check_damaged(b'\x00junk')
+
+    def test_truncated(self):
+        self.parse(self.trees)
+        self.check_damaged(self.trees.read(self.source)[:100])
+
+    def test_wrong_entries(self):
+        # a node of a class out of `_CLASSES`, and one which refers to a token out of the lexemes
+        self.check_damaged(marshal.dumps(([], [(len(self.source),)])))
+        self.check_damaged(marshal.dumps(([], [(19, 0, 1, 1)])))
+
+
+if __name__ == '__main__':
+    unittest.main()